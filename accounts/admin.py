@@ -1,6 +1,8 @@
 from django.contrib import admin
-from .models import CustomUser, Post, Category
+from .models import CustomUser, Post, Category, PostStats, QueuedTask
 
 admin.site.register(CustomUser)
 admin.site.register(Post)
 admin.site.register(Category)
+admin.site.register(QueuedTask)
+admin.site.register(PostStats)
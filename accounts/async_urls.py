@@ -0,0 +1,15 @@
+from . import async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+# The views in accounts.urls that have an async version in accounts.async_views, by URL name.
+ASYNC_VIEWS = {
+    'latest_blog_posts': async_views.latest_blog_posts,
+    'post_detail': async_views.post_detail,
+    'profile': async_views.profile,
+}
+
+urlpatterns = []
+for pattern in sync_urlpatterns:
+    if pattern.name in ASYNC_VIEWS:
+        pattern = type(pattern)(pattern.pattern, ASYNC_VIEWS[pattern.name], pattern.default_args, pattern.name)
+    urlpatterns.append(pattern)
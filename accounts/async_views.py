@@ -0,0 +1,145 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.core.paginator import Paginator
+from django.shortcuts import aget_object_or_404, redirect, render
+from django.template.loader import render_to_string
+
+from .cache import acached_post_detail, acategory_choices
+from .comment_buffer import comment_buffer
+from .conditional import acondition, alisting_validators, apost_detail_validators
+from .forms import CommentForm
+from .models import Comment, Post
+from .pagination import KeysetPage, akeyset_paginate, akeyset_paginate_forward
+from .routers import read_from_replica
+from .taskqueue import enqueue
+from .tasks import refresh_post_caches
+from .views import COMMENT_FIELDS, COMMENTS_PER_PAGE, POST_CARD_FIELDS, POST_DETAIL_FIELDS, POSTS_PER_PAGE
+
+# Async versions of the read-heavy views, routed to under ASGI (see accounts.async_urls). They produce the same
+# pages as their counterparts in accounts.views, but every query goes through the async ORM, so a request never
+# ties up a worker thread while it waits on the database. Templates are rendered only from data that has already
+# been loaded, since template rendering is synchronous.
+
+
+async def profile(request):
+    """
+        Async version of accounts.views.profile.
+
+        Parameters:
+        - request: HttpRequest object, containing metadata about the request.
+
+        Returns:
+        - HttpResponse object rendering the 'accounts/profile.html' template with the user and their posts as context.
+        """
+    user = request.user = await request.auser()
+    user_posts = Post.objects.filter(author=user).only('title', 'excerpt', 'created_at').order_by('-created_at')
+    user_posts = [post async for post in user_posts]
+    return render(request, 'accounts/profile.html', {'user': user, 'user_posts': user_posts})
+
+
+@read_from_replica
+@acondition(alisting_validators)
+async def latest_blog_posts(request):
+    """
+        Async version of accounts.views.latest_blog_posts.
+
+        Parameters:
+        - request: HttpRequest object, with optional 'category', 'after'/'before' cursor and legacy 'page' GET
+          parameters.
+
+        Workflow:
+        1. Filters the posts by category if one is given.
+        2. A legacy 'page' number is served with acount() and a slice; otherwise the 'after' or 'before' cursor
+           selects the page with keyset pagination.
+        3. Fetches all categories, with their post counts, for the category filter options.
+
+        Returns:
+        - HttpResponse object rendering the 'accounts/latest_blog_posts.html' template.
+        """
+    request.user = await request.auser()
+    category_id = request.GET.get('category')
+    posts_list = Post.objects.select_related('author').only(*POST_CARD_FIELDS)
+    if category_id:
+        posts_list = posts_list.filter(category_id=category_id)
+
+    page_number = request.GET.get('page')
+    if page_number:
+        # Paginator only validates the page number here; the count and the rows come from the async ORM.
+        page = Paginator(range(await posts_list.acount()), POSTS_PER_PAGE).get_page(page_number)
+        offset = (page.number - 1) * POSTS_PER_PAGE
+        rows = posts_list.order_by('-created_at', '-id')[offset:offset + POSTS_PER_PAGE]
+        page_obj = KeysetPage([post async for post in rows], page.has_next(), page.has_previous())
+    else:
+        page_obj = await akeyset_paginate(posts_list, POSTS_PER_PAGE,
+                                          after=request.GET.get('after'), before=request.GET.get('before'))
+    categories = await acategory_choices()
+
+    return render(request, 'accounts/latest_blog_posts.html', {
+        'page_obj': page_obj,
+        'categories': categories,
+        'selected_category': category_id,
+        'selected_category_id': int(category_id) if category_id and category_id.isdigit() else None,
+    })
+
+
+async def arender_post_detail_block(pk):
+    """
+        Async version of accounts.views.render_post_detail_block.
+
+        Raises Http404 if the post does not exist.
+        """
+    post = await aget_object_or_404(Post.objects.select_related('author').only(*POST_DETAIL_FIELDS), pk=pk)
+    comments = Comment.objects.filter(post_id=pk, active=True).only(*COMMENT_FIELDS)
+    comments = await akeyset_paginate_forward(comments, COMMENTS_PER_PAGE, 'created_on')
+    html = render_to_string('accounts/post_detail_content.html', {'post': post, 'comments': comments})
+    return {'title': post.title, 'html': html, 'author_id': post.author_id}
+
+
+@read_from_replica
+@acondition(apost_detail_validators)
+async def post_detail(request, pk):
+    """
+        Async version of accounts.views.post_detail.
+
+        Parameters:
+        - request: HttpRequest object
+        - pk: Primary key of the post to be displayed
+
+        Workflow:
+        1. If the request method is POST, the post is fetched with aget (a 404 error is raised if it does not exist)
+           and a valid comment is saved with asave(), which invalidates the cached block, followed by a redirect to
+           the post, or handed to the write-behind buffer with settings.COMMENT_WRITE_BEHIND.
+        2. The post and comment block is taken from the cache, or rendered from the database and cached on a miss.
+
+        Returns:
+        - HttpResponse object rendering the 'accounts/post_detail.html' template with the post block, new comment,
+          and comment form as context, or a redirect to the post once a comment has been saved.
+        """
+    request.user = await request.auser()
+    new_comment = None
+
+    if request.method == 'POST':
+        post = await aget_object_or_404(Post.objects.only('pk'), pk=pk)
+        comment_form = CommentForm(data=request.POST)
+        if comment_form.is_valid():
+            new_comment = comment_form.save(commit=False)
+            new_comment.post = post
+            if settings.COMMENT_WRITE_BEHIND:
+                # Only appends to a list, unless COMMENT_BUFFER_FLUSH_SECONDS = 0 makes this call flush.
+                await sync_to_async(comment_buffer.add)(new_comment)
+            else:
+                await new_comment.asave()
+                await sync_to_async(enqueue)(refresh_post_caches, post.pk)
+                messages.success(request, 'Your comment has been added!')
+                return redirect('post_detail', pk=pk)
+    else:
+        comment_form = CommentForm()
+
+    post_block = await acached_post_detail(pk, lambda: arender_post_detail_block(pk))
+
+    return render(request, 'accounts/post_detail.html', {
+        'post_block': post_block,
+        'new_comment': new_comment,
+        'comment_form': comment_form
+    })
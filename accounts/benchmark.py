@@ -0,0 +1,61 @@
+import json
+import math
+import time
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list of numbers."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies_ms, elapsed_s, query_counts=(), errors=0):
+    """
+        Summarize one benchmark run.
+
+        Parameters:
+        - latencies_ms: per-request latencies in milliseconds
+        - elapsed_s: wall-clock duration of the whole run, used for throughput
+        - query_counts: per-request SQL query counts, if they were recorded
+        - errors: number of requests that failed
+
+        Returns:
+        - a JSON-serializable dict of latency percentiles, throughput and query counts
+        """
+    latencies = sorted(latencies_ms)
+    summary = {
+        'requests': len(latencies),
+        'errors': errors,
+        'mean_ms': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'throughput_rps': round(len(latencies) / elapsed_s, 1) if elapsed_s else 0.0,
+    }
+    if query_counts:
+        summary['queries_mean'] = round(sum(query_counts) / len(query_counts), 2)
+        summary['queries_max'] = max(query_counts)
+    return summary
+
+
+def write_results(path, results, **metadata):
+    """Save benchmark results, plus metadata describing the run, as JSON."""
+    document = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'), **metadata, 'results': results}
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+
+
+def compare_results(baseline, results):
+    """
+        Yield (name, metric, before, after, change %) for every metric present in both runs.
+        """
+    for name, summary in results.items():
+        before = baseline.get('results', {}).get(name)
+        if not before:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'queries_mean'):
+            if metric in summary and metric in before and before[metric]:
+                change = (summary[metric] - before[metric]) / before[metric] * 100
+                yield name, metric, before[metric], summary[metric], change
@@ -0,0 +1,181 @@
+import time
+from datetime import datetime, timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Category, Post
+from .routers import primary_reads
+
+
+def _version_key(scope, pk):
+    return f'{scope}:{pk}:version'
+
+
+def get_version(scope, pk):
+    """
+        Return the current cache version of an object, e.g. get_version('post', 1).
+
+        Cached data derived from the object is stored under keys that include this version, so bumping
+        it invalidates all of them at once without having to know or delete the keys.
+        """
+    key = _version_key(scope, pk)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock rather than 1: if the version key was evicted, restarting at 1 could
+        # bring back entries that were cached under an old version and never invalidated.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(scope, pk):
+    """Async version of get_version(), through the cache's async methods."""
+    key = _version_key(scope, pk)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_version(scope, pk):
+    """
+        Invalidate everything cached under the current version of an object.
+
+        The new version is the current time in nanoseconds (or one more than the old version, if that is
+        later), so that version_time() can tell when the object last changed.
+        """
+    key = _version_key(scope, pk)
+    cache.set(key, max(time.time_ns(), (cache.get(key) or 0) + 1), None)
+
+
+def version_datetime(version):
+    """
+        Return the time of a cache version (from get_version()) as an aware datetime: when it was last bumped, or
+        when the version was first read if it has never been bumped since. Never earlier than the last change the
+        invalidation signals saw, so it can be folded into a Last-Modified time.
+        """
+    return datetime.fromtimestamp(version / 1e9, tz=timezone.utc)
+
+
+def version_time(scope, pk):
+    """The time of an object's current cache version; see version_datetime()."""
+    return version_datetime(get_version(scope, pk))
+
+
+def cached_post_detail(pk, build):
+    """
+        Read-through cache for the rendered body (post and comments) of a post_detail page.
+
+        Parameters:
+        - pk: primary key of the post
+        - build: callable returning a dict with the rendered block and the post's 'author_id';
+          called on a miss, or when the post or its author changed since the block was cached. It reads from the
+          primary database, so that a lagging read replica can't leave stale data in the cache.
+
+        Returns:
+        - the cached or freshly built dict
+        """
+    key = f'post:{pk}:v{get_version("post", pk)}:detail'
+    block = cache.get(key)
+    if block is not None and block['author_version'] == get_version('author', block['author_id']):
+        return block
+
+    with primary_reads():
+        block = build()
+    block['author_version'] = get_version('author', block['author_id'])
+    cache.set(key, block, settings.POST_DETAIL_CACHE_TIMEOUT)
+    return block
+
+
+async def acached_post_detail(pk, abuild):
+    """
+        Async version of cached_post_detail(); abuild is a coroutine function. The cache is used through its async
+        methods, so that a file or network cache does not block the event loop.
+        """
+    key = f'post:{pk}:v{await aget_version("post", pk)}:detail'
+    block = await cache.aget(key)
+    if block is not None and block['author_version'] == await aget_version('author', block['author_id']):
+        return block
+
+    with primary_reads():
+        block = await abuild()
+    block['author_version'] = await aget_version('author', block['author_id'])
+    await cache.aset(key, block, settings.POST_DETAIL_CACHE_TIMEOUT)
+    return block
+
+
+# (version, categories) of the last category list this process loaded.
+_category_choices = (None, ())
+
+
+def category_choices():
+    """
+        Return every category, annotated with its post_count, for the category filter dropdown.
+
+        The list is kept in process memory and reloaded, with one aggregate query, only after the
+        'categories' version has been bumped by a Category or Post save or delete.
+        """
+    global _category_choices
+    version = get_version('categories', 'all')
+    cached_version, categories = _category_choices
+    if cached_version != version:
+        with primary_reads():
+            categories = tuple(_categories_with_counts())
+        _category_choices = (version, categories)
+    return categories
+
+
+async def acategory_choices():
+    """Async version of category_choices()."""
+    global _category_choices
+    version = await aget_version('categories', 'all')
+    cached_version, categories = _category_choices
+    if cached_version != version:
+        with primary_reads():
+            categories = tuple([category async for category in _categories_with_counts()])
+        _category_choices = (version, categories)
+    return categories
+
+
+def _categories_with_counts():
+    # A correlated count per category seeks the (category, created_at) index, where a JOIN + GROUP BY
+    # over every post would need a temporary B-tree.
+    post_count = (Post.objects.filter(category=OuterRef('pk')).order_by()
+                  .values('category').annotate(count=Count('*')).values('count'))
+    return Category.objects.annotate(post_count=Coalesce(Subquery(post_count), 0)).order_by('pk')
+
+
+def cached_user(request):
+    """
+        Return the user of the request's session, like django.contrib.auth.get_user(), through a short-lived cache.
+
+        Entries are keyed by the user id, the user's 'author' cache version and the session's auth hash. The hash
+        changes with the password, and the version is bumped by every save of the user (other than a login updating
+        last_login), including profile edits and password changes, so a cached user is never served after either.
+        A miss, or a session without an auth hash, goes through get_user(), which verifies the session.
+        """
+    session = request.session
+    user_id, backend_path, session_hash = (session.get(SESSION_KEY), session.get(BACKEND_SESSION_KEY),
+                                           session.get(HASH_SESSION_KEY))
+    if user_id is None or not session_hash or backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return auth.get_user(request)
+
+    key = f'user:{user_id}:v{get_version("author", user_id)}:{session_hash}'
+    user = cache.get(key)
+    if user is None:
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+    return user
+
+
+async def acached_user(request):
+    """Async version of cached_user(); the session is loaded on a thread as the backends are synchronous."""
+    return await sync_to_async(cached_user)(request)
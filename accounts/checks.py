@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+        Warn when deploying with a per-process cache: the cache versions that invalidate cached posts and feeds,
+        the cached users and the login rate limits all have to be shared by the worker processes.
+        """
+    if settings.CACHES['default']['BACKEND'] != 'django.core.cache.backends.locmem.LocMemCache':
+        return []
+    return [Warning(
+        'The default cache is LocMemCache, which each worker process keeps to itself.',
+        hint='Use a shared cache (e.g. RedisCache or FileBasedCache, as in myblog.settings_production) unless the '
+             'site runs in a single process.',
+        id='accounts.W001',
+    )]
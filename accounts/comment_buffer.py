@@ -0,0 +1,87 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Comment, Post
+from .routers import mark_written
+from .signals import comments_changed
+from .taskqueue import enqueue
+from .tasks import refresh_post_caches
+from .writebehind import WriteBehindBuffer
+
+logger = logging.getLogger('accounts.comments')
+
+
+class CommentBuffer(WriteBehindBuffer):
+    """
+        Write-behind buffer for new comments (settings.COMMENT_WRITE_BEHIND).
+
+        Comments validated by post_detail are added here instead of being saved one INSERT at a time, and a
+        background thread writes them with a single bulk_create once COMMENT_BUFFER_SIZE comments are waiting or
+        COMMENT_BUFFER_FLUSH_SECONDS have passed, whichever comes first. The buffer is flushed when the process
+        exits normally, so a clean shutdown loses nothing; a crash loses at most the comments still waiting.
+        """
+    interval_setting = 'COMMENT_BUFFER_FLUSH_SECONDS'
+
+    def __init__(self):
+        super().__init__()
+        self._comments = []
+
+    def __len__(self):
+        with self._lock:
+            return len(self._comments)
+
+    def add(self, comment):
+        """
+            Queue an unsaved, validated comment to be written. Returns without touching the database.
+
+            If COMMENT_BUFFER_FLUSH_SECONDS is 0 there is no background thread, and the call that fills the
+            buffer up to COMMENT_BUFFER_SIZE flushes it itself.
+            """
+        # The author's session reads from the primary database for a while, as after any other write.
+        mark_written()
+        with self._lock:
+            self._comments.append(comment)
+            full = len(self._comments) >= settings.COMMENT_BUFFER_SIZE
+        self.start()
+        if full:
+            self.wake()
+
+    def flush(self):
+        """
+            Write every waiting comment with one bulk_create, then update the stored comment counts and the cache
+            versions of the posts concerned (bulk_create sends no post_save signals) and queue their caches to be
+            re-rendered. Comments on posts that have been deleted in the meantime are dropped.
+
+            If the write fails the comments are put back, to be retried on the next flush.
+
+            Returns:
+            - the number of comments written
+            """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._comments = self._comments, []
+            if not batch:
+                return 0
+            try:
+                with transaction.atomic():
+                    post_ids = set(Post.objects.filter(pk__in={comment.post_id for comment in batch})
+                                   .values_list('pk', flat=True))
+                    comments = [comment for comment in batch if comment.post_id in post_ids]
+                    if len(comments) < len(batch):
+                        logger.warning('Dropping %d buffered comments on deleted posts', len(batch) - len(comments))
+                    Comment.objects.bulk_create(comments)
+                    comments_changed(sorted(post_ids))
+            except Exception:
+                logger.exception('Could not write %d buffered comments; retrying on the next flush', len(batch))
+                with self._lock:
+                    self._comments[:0] = batch
+                return 0
+            for post_id in sorted(post_ids):
+                enqueue(refresh_post_caches, post_id)
+            logger.debug('Wrote %d buffered comments', len(comments))
+            return len(comments)
+
+
+comment_buffer = CommentBuffer()
@@ -0,0 +1,141 @@
+import hashlib
+from functools import wraps
+
+from django.db.models import Max, OuterRef, Subquery
+from django.views.decorators.http import condition
+
+from .cache import aget_version, get_version, version_datetime
+from .models import Comment, Post
+
+
+def _etag(*parts):
+    return hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _post_detail_row(pk):
+    latest_comment = (Comment.objects.filter(post=OuterRef('pk'), active=True)
+                      .order_by('-created_on').values('created_on')[:1])
+    return (Post.objects.filter(pk=pk)
+            .annotate(latest_comment=Subquery(latest_comment))
+            .values_list('updated_at', 'author_id', 'latest_comment'))
+
+
+def _post_detail_from_row(row, post_version, author_version, is_authenticated):
+    updated_at, author_id, latest_comment = row
+    # Deleted comments and renamed authors leave the timestamps alone, but bump the post and author versions.
+    last_modified = max(filter(None, (updated_at, latest_comment, version_datetime(post_version),
+                                      version_datetime(author_version))))
+    etag = _etag(updated_at, latest_comment, post_version, author_version, is_authenticated)
+    return etag, last_modified
+
+
+def _post_detail_validators(request, pk):
+    """
+        Return (etag, last_modified) for a post_detail page, or (None, None) if there is nothing to validate.
+
+        The post's updated_at, its author and its latest active comment are read in one aggregate query. The
+        cache versions bumped by the invalidation signals are folded into the ETag and, as the times they were
+        bumped, into Last-Modified too, so deleted comments and renamed authors change both even though they leave
+        those timestamps alone.
+        """
+    if not hasattr(request, '_post_detail_validators'):
+        validators = (None, None)
+        row = _post_detail_row(pk).first() if request.method in ('GET', 'HEAD') else None
+        if row is not None:
+            validators = _post_detail_from_row(row, get_version('post', pk), get_version('author', row[1]),
+                                               request.user.is_authenticated)
+        request._post_detail_validators = validators
+    return request._post_detail_validators
+
+
+async def apost_detail_validators(request, pk):
+    """Async version of the post_detail validators, for the async views."""
+    if request.method not in ('GET', 'HEAD'):
+        return None, None
+    row = await _post_detail_row(pk).afirst()
+    if row is None:
+        return None, None
+    user = await request.auser()
+    return _post_detail_from_row(row, await aget_version('post', pk), await aget_version('author', row[1]),
+                                 user.is_authenticated)
+
+
+def post_detail_etag(request, pk):
+    return _post_detail_validators(request, pk)[0]
+
+
+def post_detail_last_modified(request, pk):
+    return _post_detail_validators(request, pk)[1]
+
+
+def _listing_posts(request):
+    posts = Post.objects.all()
+    category_id = request.GET.get('category')
+    if category_id:
+        posts = posts.filter(category_id=category_id)
+    return posts
+
+
+def _listing_from_last_modified(last_modified, pages_version, is_authenticated):
+    etag = _etag(last_modified, pages_version, is_authenticated)
+    # Deleted posts and edited categories and authors leave Max(updated_at) alone, but bump the 'pages' version.
+    return etag, max(filter(None, (last_modified, version_datetime(pages_version))))
+
+
+def _listing_validators(request):
+    """
+        Return (etag, last_modified) for a latest_blog_posts page.
+
+        Last-Modified is the newest updated_at among the posts matching the category filter, read in one
+        aggregate query, or the time the 'pages' cache version was last bumped if that is later: the version also
+        changes when a post is deleted or a category or author is edited. The ETag adds the version itself.
+        """
+    if not hasattr(request, '_listing_validators'):
+        validators = (None, None)
+        if request.method in ('GET', 'HEAD'):
+            last_modified = _listing_posts(request).aggregate(last_modified=Max('updated_at'))['last_modified']
+            validators = _listing_from_last_modified(last_modified, get_version('pages', 'all'),
+                                                     request.user.is_authenticated)
+        request._listing_validators = validators
+    return request._listing_validators
+
+
+async def alisting_validators(request):
+    """Async version of the latest_blog_posts validators, for the async views."""
+    if request.method not in ('GET', 'HEAD'):
+        return None, None
+    user = await request.auser()
+    aggregate = await _listing_posts(request).aaggregate(last_modified=Max('updated_at'))
+    return _listing_from_last_modified(aggregate['last_modified'], await aget_version('pages', 'all'),
+                                       user.is_authenticated)
+
+
+def listing_etag(request):
+    return _listing_validators(request)[0]
+
+
+def listing_last_modified(request):
+    return _listing_validators(request)[1]
+
+
+def acondition(avalidators):
+    """
+        Async counterpart of Django's @condition for async views.
+
+        @condition calls its ETag and Last-Modified functions synchronously even when it wraps a coroutine, which
+        would run ORM queries inside the event loop. Here avalidators (a coroutine function returning
+        (etag, last_modified)) is awaited first and @condition is handed its result.
+        """
+    def decorator(view):
+        conditional_view = condition(etag_func=lambda request, *args, **kwargs: request._async_validators[0],
+                                     last_modified_func=lambda request, *args, **kwargs: request._async_validators[1]
+                                     )(view)
+
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            request._async_validators = await avalidators(request, *args, **kwargs)
+            return await conditional_view(request, *args, **kwargs)
+
+        return inner
+
+    return decorator
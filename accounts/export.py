@@ -0,0 +1,102 @@
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment, Post
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Encoded rows sent per hop to the worker thread when streaming an export under ASGI.
+ASYNC_LINES_PER_CHUNK = 500
+
+
+def parse_since(value):
+    """
+        Parse the 'since' of an export: an ISO 8601 datetime, taken to be in the default time zone if it has none.
+
+        Raises ValueError if value is not a valid datetime, whether malformed ('yesterday') or out of range
+        ('2024-13-01T00:00:00').
+        """
+    since = parse_datetime(value)
+    if since is None:
+        raise ValueError(f'{value!r} is not an ISO 8601 datetime')
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, timezone.get_default_timezone())
+    return since
+
+
+def export_posts(since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+        Yield every post as a dict, with its author's and category's names, oldest change first.
+
+        Parameters:
+        - since: if given, only posts updated at or after this datetime
+        - chunk_size: rows fetched from the database at a time
+
+        Rows are streamed from a server-side cursor, so memory use does not grow with the table.
+        """
+    posts = Post.objects.all()
+    if since is not None:
+        posts = posts.filter(updated_at__gte=since)
+    return posts.order_by('updated_at', 'id').values(
+        'id', 'title', 'content', 'created_at', 'updated_at', 'author_id', 'category_id',
+        author_first_name=F('author__first_name'), author_last_name=F('author__last_name'),
+        category_name=F('category__name'),
+    ).iterator(chunk_size=chunk_size)
+
+
+def export_comments(since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+        Yield every comment as a dict, oldest first.
+
+        Parameters:
+        - since: if given, only comments created at or after this datetime (comments are never edited)
+        - chunk_size: rows fetched from the database at a time
+        """
+    comments = Comment.objects.all()
+    if since is not None:
+        comments = comments.filter(created_on__gte=since)
+    return comments.order_by('created_on', 'id').values(
+        'id', 'post_id', 'name', 'email', 'body', 'created_on', 'active',
+    ).iterator(chunk_size=chunk_size)
+
+
+EXPORTS = {
+    'posts': export_posts,
+    'comments': export_comments,
+}
+
+
+def ndjson_lines(rows):
+    """Encode rows as newline-delimited JSON, one line per row."""
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def json_array_chunks(rows):
+    """Encode rows as a single JSON array, one element at a time."""
+    yield '['
+    separator = ''
+    for row in rows:
+        yield separator + json.dumps(row, cls=DjangoJSONEncoder)
+        separator = ',\n'
+    yield ']\n'
+
+
+async def async_chunks(chunks, lines_per_chunk=ASYNC_LINES_PER_CHUNK):
+    """
+        Stream the encoded chunks of an export from an async generator, for StreamingHttpResponse under ASGI.
+
+        Django would otherwise read a synchronous iterator to the end, holding the whole export in memory, before
+        sending anything. The rows are fetched and encoded lines_per_chunk at a time in the thread that runs sync
+        code, which keeps the export's database cursor on one connection.
+        """
+    chunks = iter(chunks)
+    take = sync_to_async(lambda: ''.join(islice(chunks, lines_per_chunk)), thread_sensitive=True)
+    while chunk := await take():
+        yield chunk
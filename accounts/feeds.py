@@ -0,0 +1,150 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.http import condition
+
+from .cache import get_version, version_time
+from .models import Category, CustomUser, Post
+
+FEED_ITEMS = 20
+FEED_POST_FIELDS = ('title', 'excerpt', 'created_at', 'updated_at', 'author__first_name', 'author__last_name')
+
+
+class LatestPostsFeed(Feed):
+    title = 'My Blog'
+    description = 'The latest posts on My Blog.'
+
+    def link(self):
+        return reverse('latest_blog_posts')
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return (self.posts(obj).select_related('author').only(*FEED_POST_FIELDS)
+                .order_by('-created_at', '-id')[:FEED_ITEMS])
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.excerpt
+
+    def item_link(self, item):
+        return reverse('post_detail', args=[item.pk])
+
+    def item_author_name(self, item):
+        return f'{item.author.first_name} {item.author.last_name}'.strip()
+
+    def item_pubdate(self, item):
+        return item.created_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class CategoryFeed(LatestPostsFeed):
+
+    def get_object(self, request, pk):
+        return get_object_or_404(Category, pk=pk)
+
+    def title(self, obj):
+        return f'My Blog: {obj.name}'
+
+    def description(self, obj):
+        return obj.description or f'The latest posts in {obj.name} on My Blog.'
+
+    def link(self, obj):
+        return f'{reverse("latest_blog_posts")}?category={obj.pk}'
+
+    def posts(self, obj):
+        return Post.objects.filter(category=obj)
+
+
+class CategoryAtomFeed(CategoryFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+class AuthorFeed(LatestPostsFeed):
+
+    def get_object(self, request, pk):
+        return get_object_or_404(CustomUser.objects.only('first_name', 'last_name'), pk=pk, is_active=True)
+
+    def title(self, obj):
+        return f'My Blog: posts by {obj.first_name} {obj.last_name}'
+
+    def description(self, obj):
+        return f'The latest posts by {obj.first_name} {obj.last_name} on My Blog.'
+
+    def posts(self, obj):
+        return Post.objects.filter(author=obj)
+
+
+class AuthorAtomFeed(AuthorFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+def cached_feed(feed_class, filter_field=None):
+    """
+        Build a view serving feed_class with caching and conditional GET support.
+
+        The generated document is cached until a post, category or author change bumps the 'feeds' version.
+        Last-Modified is the newest updated_at among the feed's posts, read in one aggregate query (filtered on
+        filter_field = the 'pk' URL argument for per-category and per-author feeds), or the time the 'feeds'
+        version was last bumped if that is later, so a polling aggregator that sends back its ETag or
+        Last-Modified gets a 304 without the feed being rendered or even loaded from the cache.
+        """
+    feed = feed_class()
+
+    def validators(request, **kwargs):
+        if not hasattr(request, '_feed_validators'):
+            posts = Post.objects.all()
+            if filter_field:
+                posts = posts.filter(**{filter_field: kwargs['pk']})
+            last_modified = posts.aggregate(last_modified=Max('updated_at'))['last_modified']
+            etag = hashlib.md5(f'{last_modified}|{get_version("feeds", "all")}'.encode()).hexdigest()
+            # Category and author edits leave updated_at alone, but bump the 'feeds' version.
+            request._feed_validators = (etag, max(filter(None, (last_modified, version_time('feeds', 'all')))))
+        return request._feed_validators
+
+    @condition(etag_func=lambda request, **kwargs: validators(request, **kwargs)[0],
+               last_modified_func=lambda request, **kwargs: validators(request, **kwargs)[1])
+    def view(request, **kwargs):
+        key = f'feed:{hashlib.md5(request.path.encode()).hexdigest()}:v{get_version("feeds", "all")}'
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+        response = feed(request, **kwargs)
+        cache.set(key, (response.content, response['Content-Type']), settings.FEED_CACHE_TIMEOUT)
+        # The syndication view dates the feed by its newest item; @condition sets the Last-Modified above instead.
+        del response['Last-Modified']
+        return response
+
+    return view
+
+
+latest_posts_rss = cached_feed(LatestPostsFeed)
+latest_posts_atom = cached_feed(LatestPostsAtomFeed)
+category_rss = cached_feed(CategoryFeed, 'category_id')
+category_atom = cached_feed(CategoryAtomFeed, 'category_id')
+author_rss = cached_feed(AuthorFeed, 'author_id')
+author_atom = cached_feed(AuthorAtomFeed, 'author_id')
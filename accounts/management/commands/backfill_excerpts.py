@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import Post, make_excerpt
+
+
+class Command(BaseCommand):
+    help = 'Fill in Post.excerpt for existing posts, in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of posts loaded and updated per transaction.')
+        parser.add_argument('--all', action='store_true',
+                            help='Recompute every excerpt, not only the empty ones.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        posts = Post.objects.only('content', 'excerpt').order_by('pk')
+        if not options['all']:
+            posts = posts.filter(excerpt='')
+
+        last_pk = 0
+        updated = 0
+        while True:
+            # Walk the table by primary key so every batch is an index seek, however far in we are.
+            batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            for post in batch:
+                post.excerpt = make_excerpt(post.content)
+            with transaction.atomic():
+                Post.objects.bulk_update(batch, ['excerpt'])
+            last_pk = batch[-1].pk
+            updated += len(batch)
+            self.stdout.write(f'Backfilled {updated} excerpts (up to post {last_pk})')
+
+        self.stdout.write(self.style.SUCCESS(f'Done, {updated} excerpts updated.'))
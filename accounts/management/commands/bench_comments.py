@@ -0,0 +1,113 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from accounts.benchmark import compare_results, summarize, write_results
+from accounts.comment_buffer import comment_buffer
+from accounts.models import Comment, Post
+
+BENCHMARK_EMAIL = 'bench-comments@example.com'
+
+
+class Command(BaseCommand):
+    help = ('Benchmark a burst of comments posted concurrently to a few hot posts, once saved directly and once '
+            'through the write-behind buffer (COMMENT_WRITE_BEHIND), through the test client against the configured '
+            'database. The benchmark comments are deleted afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=500, help='Comments posted per mode.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Client threads posting at once.')
+        parser.add_argument('--posts', type=int, default=1, help='Number of hot posts the burst is spread over.')
+        parser.add_argument('--buffer-size', type=int, default=100, help='COMMENT_BUFFER_SIZE for the buffered run.')
+        parser.add_argument('--flush-seconds', type=float, default=0.5,
+                            help='COMMENT_BUFFER_FLUSH_SECONDS for the buffered run.')
+        parser.add_argument('--host', default='localhost', help='Host header to send; must be in ALLOWED_HOSTS.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark comments.')
+        parser.add_argument('--output', help='Write JSON results to this file.')
+        parser.add_argument('--compare', help='A previous JSON results file to compare against.')
+
+    def handle(self, *args, **options):
+        post_ids = list(Post.objects.order_by('-created_at').values_list('pk', flat=True)[:options['posts']])
+        if not post_ids:
+            raise CommandError('There are no posts to benchmark; run "manage.py seed_blog" first.')
+        self.options = options
+        rng = random.Random(options['seed'])
+
+        results = {}
+        for mode, write_behind in (('direct', False), ('buffered', True)):
+            requests = [(reverse('post_detail', args=[rng.choice(post_ids)]),
+                         {'name': 'Benchmark', 'email': BENCHMARK_EMAIL, 'body': f'Benchmark comment {i}'})
+                        for i in range(options['comments'])]
+            with override_settings(COMMENT_WRITE_BEHIND=write_behind, COMMENT_BUFFER_SIZE=options['buffer_size'],
+                                   COMMENT_BUFFER_FLUSH_SECONDS=options['flush_seconds']):
+                results[mode] = self._run(requests)
+            summary = results[mode]
+            self.stdout.write(
+                f'{mode:<9} p50 {summary["p50_ms"]:8.2f}ms  p95 {summary["p95_ms"]:8.2f}ms  '
+                f'p99 {summary["p99_ms"]:8.2f}ms  {summary["throughput_rps"]:8.1f} req/s  '
+                f'{summary["stored_per_s"]:8.1f} stored/s  {summary["errors"]} errors')
+
+        if not options['keep']:
+            Comment.objects.filter(email=BENCHMARK_EMAIL).delete()
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            for name, metric, before, after, change in compare_results(baseline, results):
+                self.stdout.write(f'{name:<9} {metric:<15} {before:10.2f} -> {after:10.2f} ({change:+.1f}%)')
+        if options['output']:
+            write_results(options['output'], results, comments=options['comments'],
+                          concurrency=options['concurrency'], posts=len(post_ids),
+                          buffer_size=options['buffer_size'], flush_seconds=options['flush_seconds'])
+            self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+
+    def _run(self, requests):
+        """
+            POST the comments from a pool of threads, one test Client each, and wait until all of them are stored.
+
+            Besides the request latencies and throughput, the summary has 'stored_per_s': comments stored per
+            second until the last one reached the database, which includes the final flush of the buffer.
+            """
+        local = threading.local()
+        latencies = []
+        errors = 0
+        lock = threading.Lock()
+        stored_before = Comment.objects.filter(email=BENCHMARK_EMAIL).count()
+
+        def post(request):
+            nonlocal errors
+            url, data = request
+            if not hasattr(local, 'client'):
+                local.client = Client(HTTP_HOST=self.options['host'])
+            start = time.perf_counter()
+            try:
+                failed = local.client.post(url, data).status_code >= 400
+            except Exception:
+                # E.g. "database is locked" when SQLite can't keep up with concurrent INSERTs.
+                failed = True
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                errors += failed
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.options['concurrency']) as pool:
+            list(pool.map(post, requests))
+        elapsed = time.perf_counter() - start
+        comment_buffer.flush()
+        stored_elapsed = time.perf_counter() - start
+        connections.close_all()
+
+        summary = summarize(latencies, elapsed, errors=errors)
+        stored = Comment.objects.filter(email=BENCHMARK_EMAIL).count() - stored_before
+        summary['stored'] = stored
+        summary['stored_per_s'] = round(stored / stored_elapsed, 1) if stored_elapsed else 0.0
+        return summary
@@ -0,0 +1,111 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from accounts.benchmark import compare_results, summarize, write_results
+from accounts.models import CustomUser
+from accounts.throttle import login_throttle_stats, reset_login_throttle_stats
+
+VICTIM_EMAIL = 'bench-login-victim@example.com'
+USER_EMAIL = 'bench-login-user@example.com'
+USER_PASSWORD = 'bench-login-password'
+
+
+class Command(BaseCommand):
+    help = ('Simulate a credential-stuffing burst against the login view, once without and once with the login '
+            'rate limits, and report the CPU time spent and the login latency of a legitimate user meanwhile. '
+            'Two temporary users are created for the run and deleted afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=200, help='Wrong-password attempts per mode.')
+        parser.add_argument('--attackers', type=int, default=4, help='Distinct IP addresses the attempts come from.')
+        parser.add_argument('--concurrency', type=int, default=4, help='Attacking client threads.')
+        parser.add_argument('--logins', type=int, default=10, help='Legitimate logins during each attack.')
+        parser.add_argument('--host', default='localhost', help='Host header to send; must be in ALLOWED_HOSTS.')
+        parser.add_argument('--output', help='Write JSON results to this file.')
+        parser.add_argument('--compare', help='A previous JSON results file to compare against.')
+
+    def handle(self, *args, **options):
+        self.options = options
+        CustomUser.objects.filter(email__in=[VICTIM_EMAIL, USER_EMAIL]).delete()
+        CustomUser.objects.create_user(email=VICTIM_EMAIL, password=USER_PASSWORD + '-victim')
+        CustomUser.objects.create_user(email=USER_EMAIL, password=USER_PASSWORD)
+        try:
+            results = {}
+            for mode, enabled in (('unthrottled', False), ('throttled', True)):
+                with override_settings(LOGIN_THROTTLE_ENABLED=enabled):
+                    results[mode] = self._run()
+                summary = results[mode]
+                self.stdout.write(
+                    f'{mode:<12} cpu {summary["cpu_s"]:7.2f}s  {summary["cpu_ms_per_attempt"]:8.2f}ms/attempt  '
+                    f'{summary["rejected"]:5d} rejected  user login p50 {summary["p50_ms"]:8.2f}ms  '
+                    f'p95 {summary["p95_ms"]:8.2f}ms  {summary["errors"]} failed')
+        finally:
+            CustomUser.objects.filter(email__in=[VICTIM_EMAIL, USER_EMAIL]).delete()
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            for name, metric, before, after, change in compare_results(baseline, results):
+                self.stdout.write(f'{name:<12} {metric:<15} {before:10.2f} -> {after:10.2f} ({change:+.1f}%)')
+        if options['output']:
+            write_results(options['output'], results, attempts=options['attempts'],
+                          attackers=options['attackers'], concurrency=options['concurrency'])
+            self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+
+    def _run(self):
+        """
+            Send the attack from a pool of threads while the legitimate user logs in now and then from its own
+            address. Returns the user's login latencies summarized, plus the process CPU time of the whole run.
+            """
+        cache.clear()
+        reset_login_throttle_stats()
+        url = reverse('login')
+        attempts = self.options['attempts']
+        local = threading.local()
+        latencies = []
+        errors = 0
+
+        def attack(i):
+            if not hasattr(local, 'client'):
+                local.client = Client(HTTP_HOST=self.options['host'])
+            local.client.post(url, {'username': VICTIM_EMAIL, 'password': f'guess-{i}'},
+                              REMOTE_ADDR=f'203.0.113.{i % self.options["attackers"] + 1}')
+
+        def log_in():
+            nonlocal errors
+            for _ in range(self.options['logins']):
+                time.sleep(0.05)
+                client = Client(HTTP_HOST=self.options['host'])
+                start = time.perf_counter()
+                response = client.post(url, {'username': USER_EMAIL, 'password': USER_PASSWORD},
+                                       REMOTE_ADDR='198.51.100.1')
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += response.status_code != 302
+            connections.close_all()
+
+        user_thread = threading.Thread(target=log_in)
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        user_thread.start()
+        with ThreadPoolExecutor(max_workers=self.options['concurrency']) as pool:
+            list(pool.map(attack, range(attempts)))
+        user_thread.join()
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+        connections.close_all()
+
+        summary = summarize(latencies, elapsed, errors=errors)
+        stats = login_throttle_stats()
+        summary['rejected'] = stats['rejected_ip'] + stats['rejected_email']
+        summary['cpu_s'] = round(cpu, 3)
+        summary['cpu_ms_per_attempt'] = round(cpu * 1000 / attempts, 3) if attempts else 0.0
+        return summary
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from accounts.benchmark import compare_results, summarize, write_results
+from accounts.models import CustomUser, Post
+
+VIEWS = ('latest_blog_posts', 'post_detail', 'profile')
+
+
+class Command(BaseCommand):
+    help = ('Compare the concurrent throughput of the read views under WSGI (sync views on a thread pool) and '
+            'ASGI (async views on one event loop), through the test clients against the configured database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--views', nargs='+', choices=VIEWS, default=list(VIEWS))
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per view and server.')
+        parser.add_argument('--concurrency', type=int, default=10, help='Requests in flight at once.')
+        parser.add_argument('--user', help='Email of the user for the profile view; defaults to a post author.')
+        parser.add_argument('--host', default='localhost', help='Host header to send; must be in ALLOWED_HOSTS.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Write JSON results to this file.')
+        parser.add_argument('--compare', help='A previous JSON results file to compare against.')
+
+    def handle(self, *args, **options):
+        post_ids = list(Post.objects.order_by('-created_at').values_list('pk', flat=True)[:1000])
+        if not post_ids:
+            raise CommandError('There are no posts to benchmark; run "manage.py seed_blog" first.')
+        if options['user']:
+            self.user = CustomUser.objects.get(email=options['user'])
+        else:
+            self.user = CustomUser.objects.get(pk=Post.objects.values_list('author_id', flat=True).first())
+        self.options = options
+        # Log in once and share the session cookie, so that no client writes a session while the others read.
+        login_client = Client()
+        login_client.force_login(self.user)
+        self.session_cookies = login_client.cookies
+
+        rng = random.Random(options['seed'])
+        results = {}
+        for name in options['views']:
+            if name == 'post_detail':
+                urls = [reverse(name, args=[rng.choice(post_ids)]) for _ in range(options['requests'])]
+            else:
+                urls = [reverse(name)] * options['requests']
+            results[f'{name} wsgi'] = self._run_wsgi(urls, login=name == 'profile')
+            results[f'{name} asgi'] = asyncio.run(self._run_asgi(urls, login=name == 'profile'))
+            for server in ('wsgi', 'asgi'):
+                summary = results[f'{name} {server}']
+                self.stdout.write(
+                    f'{name:<18} {server}  p50 {summary["p50_ms"]:8.2f}ms  p95 {summary["p95_ms"]:8.2f}ms  '
+                    f'{summary["throughput_rps"]:8.1f} req/s  {summary["errors"]} errors')
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            for name, metric, before, after, change in compare_results(baseline, results):
+                self.stdout.write(f'{name:<23} {metric:<15} {before:10.2f} -> {after:10.2f} ({change:+.1f}%)')
+        if options['output']:
+            write_results(options['output'], results, requests=options['requests'],
+                          concurrency=options['concurrency'], posts=Post.objects.count())
+            self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+
+    def _run_wsgi(self, urls, login):
+        """Send the requests from a pool of threads, one test Client each, as a threaded WSGI server would."""
+        local = threading.local()
+        latencies = []
+        errors = 0
+        lock = threading.Lock()
+
+        def fetch(url):
+            nonlocal errors
+            if not hasattr(local, 'client'):
+                local.client = Client(HTTP_HOST=self.options['host'])
+                if login:
+                    local.client.cookies.update(self.session_cookies)
+            start = time.perf_counter()
+            response = local.client.get(url)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                if response.status_code >= 400:
+                    errors += 1
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.options['concurrency']) as pool:
+            list(pool.map(fetch, urls))
+        elapsed = time.perf_counter() - start
+        connections.close_all()
+        return summarize(latencies, elapsed, errors=errors)
+
+    async def _run_asgi(self, urls, login):
+        """Send the requests as concurrent tasks on one event loop through AsyncClient."""
+        client = AsyncClient(headers={'host': self.options['host']})
+        if login:
+            client.cookies.update(self.session_cookies)
+        semaphore = asyncio.Semaphore(self.options['concurrency'])
+        latencies = []
+        errors = 0
+
+        async def fetch(url):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(url)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code >= 400:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(fetch(url) for url in urls))
+        elapsed = time.perf_counter() - start
+        await sync_to_async(connections.close_all)()
+        return summarize(latencies, elapsed, errors=errors)
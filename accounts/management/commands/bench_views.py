@@ -0,0 +1,138 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.benchmark import compare_results, summarize, write_results
+from accounts.models import CustomUser, Post
+
+VIEWS = ('latest_blog_posts', 'post_detail', 'profile', 'create_post')
+BENCHMARK_TITLE = 'Benchmark post'
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the blog views through the test client against the configured database and report '
+            'latency percentiles, throughput and query counts. The posts created by the create_post benchmark are '
+            'deleted afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--views', nargs='+', choices=VIEWS, default=list(VIEWS))
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per view.')
+        parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests per view first.')
+        parser.add_argument('--concurrency', type=int, default=1, help='Client threads per view.')
+        parser.add_argument('--cold', action='store_true', help='Clear the cache before every request.')
+        parser.add_argument('--user', help='Email of the user for logged-in views; defaults to a post author.')
+        parser.add_argument('--host', default='localhost', help='Host header to send; must be in ALLOWED_HOSTS.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help='Keep the posts created by create_post.')
+        parser.add_argument('--output', help='Write JSON results to this file.')
+        parser.add_argument('--compare', help='A previous JSON results file to compare against.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        post_ids = list(Post.objects.order_by('-created_at').values_list('pk', flat=True)[:1000])
+        if not post_ids:
+            raise CommandError('There are no posts to benchmark; run "manage.py seed_blog" first.')
+        if options['user']:
+            user = CustomUser.objects.get(email=options['user'])
+        else:
+            user = CustomUser.objects.get(pk=Post.objects.values_list('author_id', flat=True).first())
+        self.options = options
+        self.user = user
+        self.post_ids = post_ids
+        self.category_id = Post.objects.exclude(category=None).values_list('category_id', flat=True).first()
+
+        last_post_id = Post.objects.order_by('-pk').values_list('pk', flat=True).first()
+        results = {}
+        try:
+            for name in options['views']:
+                requests = [self._make_request(name, rng) for _ in range(options['warmup'] + options['requests'])]
+                results[name] = self._run(requests[options['warmup']:], requests[:options['warmup']])
+                summary = results[name]
+                self.stdout.write(
+                    f'{name:<20} p50 {summary["p50_ms"]:8.2f}ms  p95 {summary["p95_ms"]:8.2f}ms  '
+                    f'p99 {summary["p99_ms"]:8.2f}ms  {summary["throughput_rps"]:8.1f} req/s  '
+                    f'{summary.get("queries_mean", 0):5.1f} queries  {summary["errors"]} errors')
+        finally:
+            if not options['keep']:
+                # Only the posts this run created, so that the next run measures the same data.
+                Post.objects.filter(pk__gt=last_post_id, author=user,
+                                    title__startswith=BENCHMARK_TITLE).delete()
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            for name, metric, before, after, change in compare_results(baseline, results):
+                self.stdout.write(f'{name:<20} {metric:<15} {before:10.2f} -> {after:10.2f} ({change:+.1f}%)')
+        if options['output']:
+            write_results(options['output'], results, requests=options['requests'],
+                          concurrency=options['concurrency'], cold=options['cold'],
+                          posts=Post.objects.count())
+            self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+
+    def _make_request(self, name, rng):
+        """Return (method, url, data, needs_login) for one request to the named view."""
+        if name == 'latest_blog_posts':
+            params = {}
+            if self.category_id and rng.random() < 0.3:
+                params['category'] = self.category_id
+            return 'get', reverse(name), params, False
+        if name == 'post_detail':
+            return 'get', reverse(name, args=[rng.choice(self.post_ids)]), {}, False
+        if name == 'profile':
+            return 'get', reverse(name), {}, True
+        return 'post', reverse(name), {'title': f'{BENCHMARK_TITLE} {rng.random()}', 'content': 'Benchmark content'}, True
+
+    def _run(self, requests, warmup):
+        concurrency = self.options['concurrency']
+        chunks = [requests[i::concurrency] for i in range(concurrency)]
+        latencies, query_counts = [], []
+        errors = 0
+        lock = threading.Lock()
+
+        def worker(chunk):
+            nonlocal errors
+            client = Client(HTTP_HOST=self.options['host'])
+            logged_in = False
+            for method, url, data, needs_login in chunk:
+                if needs_login and not logged_in:
+                    client.force_login(self.user)
+                    logged_in = True
+                if self.options['cold']:
+                    cache.clear()
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    response = getattr(client, method)(url, data)
+                    elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    latencies.append(elapsed)
+                    query_counts.append(len(ctx.captured_queries))
+                    if response.status_code >= 400:
+                        errors += 1
+
+        def thread_worker(chunk):
+            try:
+                worker(chunk)
+            finally:
+                connections.close_all()
+
+        worker(warmup)
+        latencies.clear()
+        query_counts.clear()
+        errors = 0
+
+        start = time.perf_counter()
+        if concurrency == 1:
+            worker(requests)
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(thread_worker, chunks))
+        return summarize(latencies, time.perf_counter() - start, query_counts, errors)
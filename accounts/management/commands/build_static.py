@@ -0,0 +1,51 @@
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.storage import (COMPRESSIBLE_EXTENSIONS, ENCODINGS, CompressedManifestStaticFilesStorage,
+                              available_encodings)
+
+
+class Command(BaseCommand):
+    help = ('Collect the static files into STATIC_ROOT with content-hashed names, a staticfiles.json manifest and '
+            'precompressed gzip (and, with the brotli package installed, brotli) copies of the text assets, and '
+            'report the bytes saved.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Delete the previously collected files first.')
+
+    def handle(self, *args, **options):
+        if not isinstance(staticfiles_storage, CompressedManifestStaticFilesStorage):
+            raise CommandError("STORAGES['staticfiles'] must be accounts.storage.CompressedManifestStaticFilesStorage "
+                               "(as in myblog.settings_production) to build the static files.")
+        if 'br' not in available_encodings():
+            self.stdout.write(self.style.WARNING('The brotli package is not installed; writing gzip copies only.'))
+        call_command('collectstatic', interactive=False, clear=options['clear'], verbosity=0)
+
+        hashed_names = set(staticfiles_storage.hashed_files.values())
+        totals = {'files': 0, 'compressible': 0, 'raw': 0, **{encoding: 0 for encoding in ENCODINGS}}
+        for name in hashed_names:
+            path = staticfiles_storage.path(name)
+            if not os.path.isfile(path):
+                continue
+            size = os.path.getsize(path)
+            totals['files'] += 1
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            totals['compressible'] += 1
+            totals['raw'] += size
+            for encoding, suffix in ENCODINGS.items():
+                # A file without a copy is served as is.
+                compressed = path + suffix
+                totals[encoding] += os.path.getsize(compressed) if os.path.exists(compressed) else size
+
+        self.stdout.write(f'{totals["files"]} hashed files in {settings.STATIC_ROOT}, '
+                          f'{totals["compressible"]} of them text assets of {totals["raw"] / 1024:.0f} KiB')
+        for encoding in available_encodings():
+            saved = 100 - totals[encoding] * 100 / totals['raw'] if totals['raw'] else 0
+            self.stdout.write(f'  {encoding:<5} {totals[encoding] / 1024:8.0f} KiB  ({saved:.1f}% smaller)')
+        manifest = staticfiles_storage.path(staticfiles_storage.manifest_name)
+        self.stdout.write(self.style.SUCCESS(f'Manifest written to {manifest}'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.export import EXPORT_CHUNK_SIZE, EXPORTS, ndjson_lines, parse_since
+
+
+class Command(BaseCommand):
+    help = 'Stream posts or comments as newline-delimited JSON, optionally only those changed since a given time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--since', help='ISO 8601 datetime; export only rows changed at or after it.')
+        parser.add_argument('--output', help='File to write to; defaults to standard output.')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = parse_since(options['since'])
+            except ValueError:
+                raise CommandError('--since must be an ISO 8601 datetime.')
+
+        rows = EXPORTS[options['kind']](since=since, chunk_size=options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.writelines(ndjson_lines(rows))
+        else:
+            for line in ndjson_lines(rows):
+                self.stdout.write(line, ending='')
@@ -0,0 +1,159 @@
+import csv
+import hashlib
+import json
+import sys
+import time
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.cache import bump_version
+from accounts.models import Category, CustomUser, Post, make_excerpt
+
+# Invalid rows reported individually before the command only counts them.
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = ('Import posts from a JSON Lines or CSV file in batches. Each row needs title, content and author_email, '
+            'and may have id, category and created_at. Re-running an import skips the posts it already loaded.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, or "-" for standard input.')
+        parser.add_argument('--format', choices=['jsonl', 'csv'],
+                            help='Input format; guessed from the file extension by default.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Posts inserted per transaction.')
+        parser.add_argument('--create-authors', action='store_true',
+                            help='Create users (who cannot log in until they reset their password) for unknown '
+                                 'author emails instead of skipping their posts.')
+
+    def handle(self, *args, **options):
+        input_format = options['format'] or ('csv' if options['path'].endswith('.csv') else 'jsonl')
+        self.create_authors = options['create_authors']
+        # Lookup maps, loaded once: resolving each row's author and category is then a dict lookup.
+        self.authors = {email.lower(): pk for email, pk in CustomUser.objects.values_list('email', 'pk')}
+        self.categories = {name: pk for name, pk in Category.objects.values_list('name', 'pk')}
+        self.counts = {'read': 0, 'imported': 0, 'existing': 0, 'skipped': 0}
+
+        try:
+            f = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8')
+        except OSError as exc:
+            raise CommandError(f'Cannot read {options["path"]}: {exc}')
+        try:
+            rows = self._read_csv(f) if input_format == 'csv' else self._read_jsonl(f)
+            start = time.perf_counter()
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                self._import_batch(batch)
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f'{self.counts["read"]} rows read, {self.counts["imported"]} imported, '
+                                  f'{self.counts["existing"]} already present, {self.counts["skipped"]} skipped '
+                                  f'({self.counts["read"] / elapsed:.0f} rows/s)')
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+        # bulk_create sends no signals, so invalidate cached pages, feeds and category counts by hand.
+        bump_version('categories', 'all')
+        bump_version('feeds', 'all')
+        bump_version('pages', 'all')
+        self.stdout.write(self.style.SUCCESS(
+            f'Done, {self.counts["imported"]} posts imported in {time.perf_counter() - start:.1f}s.'))
+
+    def _read_jsonl(self, f):
+        for line_number, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as exc:
+                    yield line_number, exc
+
+    def _read_csv(self, f):
+        csv.field_size_limit(2 ** 31 - 1)  # Post bodies can be longer than the 128 KiB default.
+        for line_number, row in enumerate(csv.DictReader(f), 2):
+            yield line_number, row
+
+    def _import_batch(self, batch):
+        posts = {}
+        valid = 0
+        for line_number, row in batch:
+            self.counts['read'] += 1
+            try:
+                post = self._make_post(row)
+            except ValueError as exc:
+                self._skip(line_number, exc)
+                continue
+            valid += 1
+            posts.setdefault(post.import_id, post)  # The first copy wins if a file repeats a row.
+
+        # One indexed lookup per batch finds the posts a previous run already imported.
+        existing = set(Post.objects.filter(import_id__in=list(posts)).values_list('import_id', flat=True))
+        new_posts = [post for import_id, post in posts.items() if import_id not in existing]
+        with transaction.atomic():
+            Post.objects.bulk_create(new_posts, ignore_conflicts=True)
+        self.counts['imported'] += len(new_posts)
+        self.counts['existing'] += valid - len(new_posts)
+
+    def _make_post(self, row):
+        """Build the Post for one input row. Raises ValueError if the row can't be imported."""
+        if isinstance(row, Exception):
+            raise ValueError(f'invalid JSON, {row}')
+        if not isinstance(row, dict):
+            raise ValueError('not a JSON object')
+        title, content = (row.get('title') or '').strip(), row.get('content') or ''
+        if not title or not content:
+            raise ValueError('title and content are required')
+
+        author_id = self._author_id(row.get('author_email') or '')
+        if author_id is None:
+            raise ValueError(f'unknown author {row.get("author_email")!r}')
+
+        created_at = timezone.now()
+        if row.get('created_at'):
+            try:
+                created_at = parse_datetime(row['created_at'])
+            except (TypeError, ValueError):
+                # A number or other non-string in JSON, or a well-formed but impossible date.
+                created_at = None
+            if created_at is None:
+                raise ValueError(f'invalid created_at {row["created_at"]!r}')
+            if timezone.is_naive(created_at):
+                created_at = timezone.make_aware(created_at, timezone.get_default_timezone())
+
+        import_id = str(row.get('id') or '')
+        if not import_id:
+            # No source id: derive one from the content, so that re-running the import still skips the row.
+            key = json.dumps([row.get('author_email'), title, row.get('created_at'), content])
+            import_id = 'sha1:' + hashlib.sha1(key.encode()).hexdigest()
+
+        return Post(import_id=import_id[:64], title=title[:200], content=content, excerpt=make_excerpt(content),
+                    author_id=author_id, category_id=self._category_id((row.get('category') or '').strip()),
+                    created_at=created_at)
+
+    def _author_id(self, email):
+        email = email.strip().lower()
+        if email not in self.authors and self.create_authors and email:
+            user = CustomUser.objects.create(email=email, password=make_password(None),
+                                             first_name=email.split('@')[0][:30])
+            self.authors[email] = user.pk
+        return self.authors.get(email)
+
+    def _category_id(self, name):
+        if not name:
+            return None
+        if name not in self.categories:
+            self.categories[name] = Category.objects.create(name=name[:100]).pk
+        return self.categories[name]
+
+    def _skip(self, line_number, reason):
+        self.counts['skipped'] += 1
+        if self.counts['skipped'] <= MAX_REPORTED_ERRORS:
+            self.stderr.write(f'Line {line_number}: skipped, {reason}')
+        elif self.counts['skipped'] == MAX_REPORTED_ERRORS + 1:
+            self.stderr.write('Further skipped rows are only counted.')
@@ -0,0 +1,157 @@
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.template.base import Node, TextNode, VariableNode
+from django.test import Client
+from django.urls import reverse
+
+from accounts.models import CustomUser, Post
+from accounts.warmup import warm_templates
+
+# Page name -> (URL name, needs a logged-in user).
+PAGES = {
+    'latest_blog_posts': ('latest_blog_posts', False),
+    'post_detail': ('post_detail', False),
+    'post_comments': ('post_comments', False),
+    'popular': ('popular', False),
+    'search': ('search', False),
+    'profile': ('profile', True),
+    'edit_profile': ('edit_profile', True),
+    'create_post': ('create_post', True),
+    'login': ('login', False),
+    'register': ('register', False),
+}
+
+
+def node_label(node):
+    """
+        What a node is reported as: 'text', '{{ var }}' or '{{ |date }}' (with the filters applied, which is
+        where the cost of a variable usually is), or the name of its template tag, e.g. '{% for %}'.
+        """
+    if isinstance(node, TextNode):
+        return 'text'
+    if isinstance(node, VariableNode):
+        filters = [func.__name__ for func, args in node.filter_expression.filters]
+        return '{{ |%s }}' % '|'.join(filters) if filters else '{{ var }}'
+    token = getattr(node, 'token', None)
+    if token is not None and token.contents:
+        return '{%% %s %%}' % token.contents.split()[0]
+    return type(node).__name__
+
+
+class RenderProfile:
+    """Self time (excluding nested nodes) and calls of the rendered template nodes, by template and by label."""
+
+    def __init__(self):
+        self.by_template = defaultdict(lambda: [0, 0.0])
+        self.by_label = defaultdict(lambda: [0, 0.0])
+        self._child_time = []
+
+    @contextmanager
+    def recording(self):
+        original = Node.render_annotated
+        profile = self
+
+        def render_annotated(node, context):
+            profile._child_time.append(0.0)
+            start = time.perf_counter()
+            try:
+                return original(node, context)
+            finally:
+                elapsed = time.perf_counter() - start
+                self_time = elapsed - profile._child_time.pop()
+                if profile._child_time:
+                    profile._child_time[-1] += elapsed
+                origin = getattr(node, 'origin', None)
+                for stats, key in ((profile.by_template, origin.template_name if origin else '?'),
+                                   (profile.by_label, node_label(node))):
+                    stats[key][0] += 1
+                    stats[key][1] += self_time
+
+        Node.render_annotated = render_annotated
+        try:
+            yield self
+        finally:
+            Node.render_annotated = original
+
+    @staticmethod
+    def rows(stats, renders):
+        """[(key, calls per render, ms per render)], costliest first."""
+        return sorted(((key, calls / renders, seconds * 1000 / renders) for key, (calls, seconds) in stats.items()),
+                      key=lambda row: -row[2])
+
+
+class Command(BaseCommand):
+    help = ('Render the blog pages through the test client against the configured database and report the time '
+            'spent per template and per template tag or filter, to find the costly parts of the templates.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', nargs='+', choices=list(PAGES), default=list(PAGES))
+        parser.add_argument('--repeat', type=int, default=20, help='Renders per page.')
+        parser.add_argument('--top', type=int, default=15, help='Tags and filters to list per page.')
+        parser.add_argument('--user', help='Email of the user for logged-in pages; defaults to a post author.')
+        parser.add_argument('--host', default='localhost', help='Host header to send; must be in ALLOWED_HOSTS.')
+        parser.add_argument('--output', help='Write JSON results to this file.')
+
+    def handle(self, *args, **options):
+        post = Post.objects.order_by('-comment_count', '-pk').only('pk', 'title', 'author_id').first()
+        if post is None:
+            raise CommandError('There are no posts to render; run "manage.py seed_blog" first.')
+        if options['user']:
+            user = CustomUser.objects.get(email=options['user'])
+        else:
+            user = CustomUser.objects.get(pk=post.author_id)
+
+        compile_ms = warm_templates()
+        self.stdout.write(f'Compiled {len(compile_ms)} templates in {sum(compile_ms.values()):.1f}ms')
+
+        anonymous = Client(HTTP_HOST=options['host'])
+        logged_in = Client(HTTP_HOST=options['host'])
+        logged_in.force_login(user)
+        results = {'compile_ms': compile_ms, 'pages': {}}
+        for name in options['pages']:
+            url_name, needs_login = PAGES[name]
+            url = self._url(url_name, post)
+            client = logged_in if needs_login else anonymous
+            profile = RenderProfile()
+            with profile.recording():
+                for _ in range(options['repeat']):
+                    # Render for real rather than from the page and fragment caches.
+                    cache.clear()
+                    response = client.get(url)
+                    if response.status_code != 200:
+                        raise CommandError(f'{url} returned {response.status_code}')
+            results['pages'][name] = self._report(name, profile, options)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+
+    def _url(self, url_name, post):
+        if url_name in ('post_detail', 'post_comments'):
+            return reverse(url_name, args=[post.pk])
+        if url_name == 'search':
+            return f'{reverse(url_name)}?{urlencode({"q": post.title.split()[0]})}'
+        return reverse(url_name)
+
+    def _report(self, name, profile, options):
+        repeat = options['repeat']
+        templates = profile.rows(profile.by_template, repeat)
+        labels = profile.rows(profile.by_label, repeat)
+        self.stdout.write(f'\n{name}: {sum(ms for _, _, ms in templates):.2f}ms of template rendering per page')
+        self.stdout.write('  by template:')
+        for template, calls, ms in templates:
+            self.stdout.write(f'    {template:<40} {ms:8.3f}ms')
+        self.stdout.write('  by tag and filter:')
+        for label, calls, ms in labels[:options['top']]:
+            self.stdout.write(f'    {label:<40} {ms:8.3f}ms  {calls:7.1f} calls  {ms * 1000 / calls:8.2f}us/call')
+        return {
+            'templates': {template: round(ms, 3) for template, calls, ms in templates},
+            'tags': {label: {'ms': round(ms, 3), 'calls': round(calls, 1)} for label, calls, ms in labels},
+        }
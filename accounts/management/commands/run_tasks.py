@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.taskqueue import requeue_stale_tasks, run_next_queued_task
+
+
+class Command(BaseCommand):
+    help = 'Run background tasks from the durable queue (TASKS_BACKEND = "database").'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once no task is due instead of polling.')
+        parser.add_argument('--max-tasks', type=int, help='Exit after running this many tasks.')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait between polls of an empty queue.')
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help='Requeue tasks another worker left running for this many seconds.')
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_tasks(options['stale_after'])
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} stale tasks')
+
+        processed = 0
+        while options['max_tasks'] is None or processed < options['max_tasks']:
+            queued = run_next_queued_task()
+            if queued is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+            processed += 1
+            self.stdout.write(f'{queued.name} {queued.status} (attempt {queued.attempts})')
+
+        self.stdout.write(self.style.SUCCESS(f'Done, {processed} tasks run.'))
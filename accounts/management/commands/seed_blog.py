@@ -0,0 +1,93 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.cache import bump_version
+from accounts.models import Category, Comment, CustomUser, Post, active_comment_count, make_excerpt
+
+WORDS = (
+    'django sqlite python query index cache page post comment author category archive cursor latency '
+    'throughput request response template render server client worker thread process memory disk write '
+    'read table column row batch stream token session profile search feed blog story draft review edit '
+    'garden travel recipe music coffee weekend morning evening river mountain city light quiet'
+).split()
+
+
+class Command(BaseCommand):
+    help = 'Bulk-generate users, categories, posts and comments for benchmarking, reproducibly.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data.')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--password', default='password123', help='Password given to every seeded user.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+
+        # Hash once: hashing a password per user would dominate the run.
+        password = make_password(options['password'])
+        emails = [f'seed{options["seed"]}-user{i}@example.com' for i in range(options['users'])]
+        CustomUser.objects.bulk_create(
+            (CustomUser(email=email, password=password, first_name=rng.choice(WORDS).title(),
+                        last_name=rng.choice(WORDS).title())
+             for email in emails),
+            batch_size=batch_size, ignore_conflicts=True)
+        author_ids = list(CustomUser.objects.filter(email__in=emails).values_list('pk', flat=True))
+        self.stdout.write(f'{len(author_ids)} users')
+
+        names = [f'Category {i}' for i in range(options['categories'])]
+        existing = set(Category.objects.filter(name__in=names).values_list('name', flat=True))
+        Category.objects.bulk_create(Category(name=name) for name in names if name not in existing)
+        category_ids = list(Category.objects.filter(name__in=names).values_list('pk', flat=True))
+        self.stdout.write(f'{len(category_ids)} categories')
+
+        post_ids = []
+        for start in range(0, options['posts'], batch_size):
+            batch = []
+            for _ in range(start, min(start + batch_size, options['posts'])):
+                content = self._paragraphs(rng)
+                batch.append(Post(
+                    title=self._sentence(rng, 3, 8), content=content, excerpt=make_excerpt(content),
+                    author_id=rng.choice(author_ids),
+                    category_id=rng.choice(category_ids) if category_ids and rng.random() < 0.9 else None,
+                ))
+            with transaction.atomic():
+                post_ids.extend(post.pk for post in Post.objects.bulk_create(batch))
+            self.stdout.write(f'{len(post_ids)} posts')
+
+        created = 0
+        for start in range(0, options['comments'] if post_ids else 0, batch_size):
+            batch = [
+                Comment(post_id=rng.choice(post_ids), name=rng.choice(WORDS).title(),
+                        email=f'reader{rng.randrange(10000)}@example.com', body=self._sentence(rng, 5, 40),
+                        active=rng.random() < 0.95)
+                for _ in range(start, min(start + batch_size, options['comments']))
+            ]
+            with transaction.atomic():
+                Comment.objects.bulk_create(batch)
+            created += len(batch)
+            self.stdout.write(f'{created} comments')
+
+        # bulk_create sends no signals, so update the stored comment counts and invalidate cached pages, feeds
+        # and category counts by hand.
+        if created:
+            Post.objects.update(comment_count=active_comment_count())
+        bump_version('categories', 'all')
+        bump_version('feeds', 'all')
+        bump_version('pages', 'all')
+        self.stdout.write(self.style.SUCCESS('Seeding complete.'))
+
+    def _sentence(self, rng, min_words, max_words):
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))).capitalize()
+
+    def _paragraphs(self, rng):
+        return '\n\n'.join(
+            '. '.join(self._sentence(rng, 6, 18) for _ in range(rng.randint(3, 8))) + '.'
+            for _ in range(rng.randint(1, 6)))
@@ -0,0 +1,565 @@
+import asyncio
+import contextvars
+import functools
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.middleware.csrf import get_token
+from django.template.backends.django import Template as DjangoTemplate
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .cache import acached_user, aget_version, cached_user, get_version
+from .routers import PINNED_UNTIL_SESSION_KEY, pin_until, primary_reads, track_writes
+from .storage import ENCODINGS
+from .view_counts import view_counter
+
+_CSRF_INPUT_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+timing_logger = logging.getLogger('accounts.timing')
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def page_cache_stats():
+    """Return this process's page cache hit/miss/stale counters."""
+    with _stats_lock:
+        return {outcome: _stats[outcome] for outcome in ('hit', 'miss', 'stale')}
+
+
+def page_cache_key(path):
+    return 'page:' + hashlib.md5(path.encode()).hexdigest()
+
+
+def reset_page_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class AsyncURLConfMiddleware:
+    """
+        Route requests served under ASGI through settings.ASGI_URLCONF, which maps the read-heavy views to their
+        async versions in accounts.async_views. Requests served under WSGI keep using ROOT_URLCONF.
+        """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self._set_urlconf(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self._set_urlconf(request)
+        return await self.get_response(request)
+
+    def _set_urlconf(self, request):
+        if isinstance(request, ASGIRequest):
+            request.urlconf = settings.ASGI_URLCONF
+
+
+def _accept_encoding_weights(header):
+    """Return {content coding: q-value} of an Accept-Encoding header; a malformed q-value counts as 0."""
+    weights = {}
+    for value in header.split(','):
+        coding, *params = [part.strip() for part in value.split(';')]
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, q = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    weight = float(q)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.lower()] = weight
+    return weights
+
+
+class PrecompressedStaticMiddleware:
+    """
+        Serve the files that build_static collected into STATIC_ROOT, ahead of the rest of the middleware.
+
+        Each file is answered with its brotli or gzip copy when the client's Accept-Encoding allows it (with
+        Vary: Accept-Encoding), so nothing is compressed per request. Files whose name carries a content hash, per
+        the staticfiles.json manifest, are cached by browsers and proxies for a year as immutable; any other file
+        for STATIC_MAX_AGE seconds, then revalidated with If-Modified-Since.
+
+        STATIC_ROOT is indexed once at startup, so run build_static before starting the server. Removes itself from
+        the chain at startup unless settings.STATIC_SERVE_PRECOMPRESSED is set.
+        """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.STATIC_SERVE_PRECOMPRESSED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.prefix = '/' + settings.STATIC_URL.lstrip('/')
+        self.files = self._index(settings.STATIC_ROOT)
+        self.immutable = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        if not self.files:
+            logging.getLogger('accounts.static').warning(
+                'No static files in %s; run "manage.py build_static"', settings.STATIC_ROOT)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        name = self._static_name(request)
+        if name is not None:
+            return self._serve(request, name)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        name = self._static_name(request)
+        if name is not None:
+            return await sync_to_async(self._serve)(request, name)
+        return await self.get_response(request)
+
+    @staticmethod
+    def _index(root):
+        """Return {name: {encoding: path}} of the files under root, '' being the uncompressed file."""
+        files = {}
+        if not root or not os.path.isdir(root):
+            return files
+        suffixes = {suffix: encoding for encoding, suffix in ENCODINGS.items()}
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                base, suffix = os.path.splitext(name)
+                encoding = suffixes.get(suffix, '')
+                files.setdefault(base if encoding else name, {})[encoding] = path
+        # Drop compressed copies without their original, e.g. a collected .gz file.
+        return {name: variants for name, variants in files.items() if '' in variants}
+
+    def _static_name(self, request):
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(self.prefix):
+            return None
+        name = request.path[len(self.prefix):]
+        return name if name in self.files else None
+
+    def _serve(self, request, name):
+        variants = self.files[name]
+        path = variants['']
+        mtime = os.path.getmtime(path)
+        if name in self.immutable:
+            cache_control = 'public, max-age=31536000, immutable'
+        else:
+            cache_control = f'public, max-age={settings.STATIC_MAX_AGE}'
+            if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), mtime):
+                response = HttpResponseNotModified()
+                response['Cache-Control'] = cache_control
+                return response
+
+        weights = _accept_encoding_weights(request.headers.get('Accept-Encoding', ''))
+        encoding = next((encoding for encoding in ENCODINGS
+                         if encoding in variants and weights.get(encoding, weights.get('*', 0)) > 0), None)
+        content_type, _ = mimetypes.guess_type(name)
+        response = FileResponse(open(variants[encoding or ''], 'rb'),
+                                content_type=content_type or 'application/octet-stream')
+        del response['Content-Disposition']
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if len(variants) > 1:
+            patch_vary_headers(response, ['Accept-Encoding'])
+        response['Cache-Control'] = cache_control
+        response['Last-Modified'] = http_date(mtime)
+        return response
+
+
+class CachedUserAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+        AuthenticationMiddleware that resolves request.user (and request.auser()) through accounts.cache.cached_user,
+        so that an authenticated request does not query the user table while the user is cached.
+        """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: _cached_request_user(request))
+        request.auser = functools.partial(_acached_request_user, request)
+
+
+def _cached_request_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = cached_user(request)
+    return request._cached_user
+
+
+async def _acached_request_user(request):
+    if not hasattr(request, '_acached_user'):
+        request._acached_user = await acached_user(request)
+    return request._acached_user
+
+
+class ReplicaRoutingMiddleware:
+    """
+        Set up read-replica routing (accounts.routers) for each request. If the request wrote to the database,
+        pin its session to the primary database for settings.REPLICA_STICKY_SECONDS, so that people see their
+        own posts and comments immediately even while the replica catches up. Must come after SessionMiddleware.
+        """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with track_writes() as state:
+            response = self.get_response(request)
+        if state['wrote']:
+            request.session[PINNED_UNTIL_SESSION_KEY] = pin_until()
+        return response
+
+    async def __acall__(self, request):
+        with track_writes() as state:
+            response = await self.get_response(request)
+        if state['wrote']:
+            await sync_to_async(request.session.__setitem__)(PINNED_UNTIL_SESSION_KEY, pin_until())
+        return response
+
+
+class ViewCountMiddleware:
+    """
+        Count every successful GET of a post_detail page with the in-process view counter (accounts.view_counts),
+        including pages served from the page cache and 304 Not Modified answers. Must come before
+        AnonymousPageCacheMiddleware, which answers cache hits without calling the middleware after it.
+
+        Removes itself from the chain at startup unless settings.VIEW_COUNTS_ENABLED is set.
+        """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.VIEW_COUNTS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self._count(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        self._count(request, response)
+        return response
+
+    def _count(self, request, response):
+        match = request.resolver_match
+        if (request.method == 'GET' and response.status_code in (200, 304)
+                and match is not None and match.url_name == 'post_detail'):
+            view_counter.count(match.kwargs['pk'])
+
+
+class AnonymousPageCacheMiddleware:
+    """
+        Full-page cache for logged-out visitors of the views named in settings.PAGE_CACHE_VIEWS.
+
+        Pages are fresh for PAGE_CACHE_TIMEOUT seconds, or until any post, comment, category or author
+        changes. After that they are stale for another PAGE_CACHE_STALE_TIMEOUT seconds: one request takes
+        a lock and re-renders the page while concurrent requests keep getting the stale copy. On a cold key
+        the requests that miss the lock wait briefly for the lock holder to fill the cache rather than all
+        rendering the same page against the database at once.
+
+        Pages are rendered for the cache from the primary database, never the read replica, so that a lagging
+        replica can't be frozen into the cache. Authenticated users, requests carrying a messages cookie and
+        anything other than GET/HEAD are never cached. Each response says how it was served in an X-Page-Cache header.
+        """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            self.process_view = self._aprocess_view
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self._is_cacheable_request(request) or request.user.is_authenticated:
+            return None
+
+        key, version, entry = self._lookup(request)
+        if entry is not None and entry['version'] == version and time.time() < entry['fresh_until']:
+            return self._serve(request, entry, 'hit')
+
+        lock_key = key + ':lock'
+        if not cache.add(lock_key, 1, settings.PAGE_CACHE_LOCK_TIMEOUT):
+            # Another request is already rendering this page.
+            if entry is not None:
+                return self._serve(request, entry, 'stale')
+            deadline = time.monotonic() + settings.PAGE_CACHE_LOCK_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                entry = cache.get(key)
+                if entry is not None:
+                    return self._serve(request, entry, 'hit')
+            lock_key = None
+
+        try:
+            with primary_reads():
+                response = view_func(request, *view_args, **view_kwargs)
+                return self._store(response, key, version)
+        finally:
+            if lock_key is not None:
+                cache.delete(lock_key)
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        """The same as process_view(), for the async request path under ASGI."""
+        if not self._is_cacheable_request(request):
+            return None
+        # Resolve the user without blocking the event loop, and keep it for the view and templates.
+        request.user = await request.auser()
+        if request.user.is_authenticated:
+            return None
+
+        # The cache is used through its async methods, so a file or network cache does not block the event loop.
+        key = page_cache_key(request.get_full_path())
+        version = await aget_version('pages', 'all')
+        entry = await cache.aget(key)
+        if entry is not None and entry['version'] == version and time.time() < entry['fresh_until']:
+            return self._serve(request, entry, 'hit')
+
+        lock_key = key + ':lock'
+        if not await cache.aadd(lock_key, 1, settings.PAGE_CACHE_LOCK_TIMEOUT):
+            if entry is not None:
+                return self._serve(request, entry, 'stale')
+            deadline = time.monotonic() + settings.PAGE_CACHE_LOCK_WAIT
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+                entry = await cache.aget(key)
+                if entry is not None:
+                    return self._serve(request, entry, 'hit')
+            lock_key = None
+
+        if not iscoroutinefunction(view_func):
+            view_func = sync_to_async(view_func)
+        try:
+            with primary_reads():
+                response = await view_func(request, *view_args, **view_kwargs)
+                response, entry = self._entry(response, version)
+            if entry is not None:
+                await cache.aset(key, entry, settings.PAGE_CACHE_TIMEOUT + settings.PAGE_CACHE_STALE_TIMEOUT)
+            return self._miss(response)
+        finally:
+            if lock_key is not None:
+                await cache.adelete(lock_key)
+
+    def _is_cacheable_request(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if request.resolver_match is None or request.resolver_match.url_name not in settings.PAGE_CACHE_VIEWS:
+            return False
+        return CookieStorage.cookie_name not in request.COOKIES
+
+    def _lookup(self, request):
+        key = page_cache_key(request.get_full_path())
+        return key, get_version('pages', 'all'), cache.get(key)
+
+    def _store(self, response, key, version):
+        response, entry = self._entry(response, version)
+        if entry is not None:
+            cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT + settings.PAGE_CACHE_STALE_TIMEOUT)
+        return self._miss(response)
+
+    def _entry(self, response, version):
+        """Render the response and return it with its cache entry, or None if it must not be cached."""
+        if hasattr(response, 'render') and callable(response.render):
+            response = response.render()
+        entry = None
+        if self._is_cacheable_response(response):
+            entry = {
+                'version': version,
+                'fresh_until': time.time() + settings.PAGE_CACHE_TIMEOUT,
+                'status': response.status_code,
+                'content_type': response['Content-Type'],
+                'content': response.content,
+                'validators': {header: response[header] for header in ('ETag', 'Last-Modified')
+                               if response.has_header(header)},
+            }
+        return response, entry
+
+    def _miss(self, response):
+        _count('miss')
+        response['X-Page-Cache'] = 'MISS'
+        return response
+
+    def _is_cacheable_response(self, response):
+        if response.status_code != 200 or response.streaming:
+            return False
+        if 'private' in response.get('Cache-Control', '') or 'no-store' in response.get('Cache-Control', ''):
+            return False
+        # The CSRF cookie is re-issued per visitor when a page is served; any other cookie is personal.
+        return all(name == settings.CSRF_COOKIE_NAME for name in response.cookies)
+
+    def _serve(self, request, entry, outcome):
+        content = entry['content']
+        if b'csrfmiddlewaretoken' in content:
+            # The cached page carries whoever rendered it's CSRF token; give this visitor their own.
+            token = get_token(request)
+            content = _CSRF_INPUT_RE.sub(lambda m: m.group(1) + token + m.group(2), content.decode()).encode()
+        response = HttpResponse(content, status=entry['status'], content_type=entry['content_type'])
+        # Lets ConditionalGetMiddleware answer a revalidating client with 304 straight from the cache.
+        for header, value in entry['validators'].items():
+            response[header] = value
+        _count(outcome)
+        response['X-Page-Cache'] = outcome.upper()
+        return response
+
+
+class RequestTimings:
+    """Timings collected for a single request by RequestTimingMiddleware."""
+
+    def __init__(self):
+        self.queries = []  # (sql, milliseconds)
+        self.template_ms = 0.0
+        self.view_ms = 0.0
+        self.render_depth = 0
+
+    @property
+    def db_ms(self):
+        return sum(duration for _, duration in self.queries)
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, (time.perf_counter() - start) * 1000))
+
+
+_current_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+def _instrument_template_render():
+    """Wrap the Django template backend's render() to add its duration to the current request's timings."""
+    render = DjangoTemplate.render
+    if getattr(render, 'timed', False):
+        return
+
+    @functools.wraps(render)
+    def timed_render(self, context=None, request=None):
+        timings = _current_timings.get()
+        if timings is None:
+            return render(self, context, request)
+        # Only the outermost render is timed, so nested renders are not counted twice.
+        timings.render_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            timings.render_depth -= 1
+            if not timings.render_depth:
+                timings.template_ms += (time.perf_counter() - start) * 1000
+
+    timed_render.timed = True
+    DjangoTemplate.render = timed_render
+
+
+class RequestTimingMiddleware:
+    """
+        Opt-in per-request profiling, enabled by settings.REQUEST_TIMING_ENABLED.
+
+        Records the number and total duration of SQL queries, the template render time, the view time and
+        the total time of every request, and reports them in a Server-Timing response header. Requests slower
+        than settings.REQUEST_TIMING_SLOW_MS are logged as JSON, with their SQL, to the 'accounts.timing'
+        logger.
+
+        When disabled the middleware removes itself from the chain at startup, so it costs nothing.
+        """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        _instrument_template_render()
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings.record_query))
+                response = self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000
+        if hasattr(request, '_timing_view_start'):
+            timings.view_ms = (time.perf_counter() - request._timing_view_start) * 1000
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={timings.db_ms:.1f};desc="{len(timings.queries)} queries"',
+            f'tpl;dur={timings.template_ms:.1f}',
+            f'view;dur={timings.view_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+        if total_ms >= settings.REQUEST_TIMING_SLOW_MS:
+            self._log_slow_request(request, response, timings, total_ms)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._timing_view_start = time.perf_counter()
+
+    def _log_slow_request(self, request, response, timings, total_ms):
+        record = {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'total_ms': round(total_ms, 1),
+            'view_ms': round(timings.view_ms, 1),
+            'template_ms': round(timings.template_ms, 1),
+            'db_ms': round(timings.db_ms, 1),
+            'query_count': len(timings.queries),
+            'queries': [{'sql': sql, 'ms': round(duration, 2)}
+                        for sql, duration in sorted(timings.queries, key=lambda q: q[1], reverse=True)],
+        }
+        timing_logger.warning(json.dumps(record), extra={'timing': record})
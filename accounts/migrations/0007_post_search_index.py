@@ -0,0 +1,59 @@
+# Generated by Django 5.0.7 on 2026-10-17 00:10
+
+from django.db import migrations
+
+# An external-content FTS5 index over accounts_post: it stores only the inverted index and reads
+# title/content back from accounts_post by rowid, so the post bodies are not duplicated on disk.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE accounts_post_fts USING fts5(
+        title, content, content='accounts_post', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER accounts_post_fts_insert AFTER INSERT ON accounts_post BEGIN
+        INSERT INTO accounts_post_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER accounts_post_fts_delete AFTER DELETE ON accounts_post BEGIN
+        INSERT INTO accounts_post_fts(accounts_post_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER accounts_post_fts_update AFTER UPDATE OF title, content ON accounts_post BEGIN
+        INSERT INTO accounts_post_fts(accounts_post_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO accounts_post_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    "INSERT INTO accounts_post_fts(accounts_post_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS accounts_post_fts_update',
+    'DROP TRIGGER IF EXISTS accounts_post_fts_delete',
+    'DROP TRIGGER IF EXISTS accounts_post_fts_insert',
+    'DROP TABLE IF EXISTS accounts_post_fts',
+]
+
+
+def run_on_sqlite(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_SQL), run_on_sqlite(DROP_SQL)),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.7 on 2026-10-17 12:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_queuedtask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='import_id',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='post',
+            constraint=models.UniqueConstraint(condition=models.Q(('import_id__isnull', False)),
+                                               fields=('import_id',), name='post_import_id_uniq'),
+        ),
+        # auto_now_add -> default=timezone.now only changes how Django fills the column, not the column itself.
+        # Applied to the state only: on SQLite, AlterField would rebuild the table and drop the search triggers.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='post',
+                    name='created_at',
+                    field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+                ),
+            ],
+        ),
+    ]
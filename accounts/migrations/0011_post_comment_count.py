@@ -0,0 +1,50 @@
+# Generated by Django 5.0.7 on 2026-10-17 13:10
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+FIELD = models.PositiveIntegerField(default=0, editable=False)
+
+
+def add_column(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        # Django adds a NOT NULL column on SQLite by rebuilding the table, which would drop the full-text search
+        # triggers; ALTER TABLE ADD COLUMN with a constant default does the same without a rebuild.
+        schema_editor.execute('ALTER TABLE accounts_post ADD COLUMN comment_count integer unsigned NOT NULL '
+                              'DEFAULT 0 CHECK (comment_count >= 0)')
+    else:
+        field = FIELD.clone()
+        field.set_attributes_from_name('comment_count')
+        schema_editor.add_field(apps.get_model('accounts', 'Post'), field)
+
+
+def remove_column(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('ALTER TABLE accounts_post DROP COLUMN comment_count')
+    else:
+        Post = apps.get_model('accounts', 'Post')
+        schema_editor.remove_field(Post, Post._meta.get_field('comment_count'))
+
+
+def backfill_comment_counts(apps, schema_editor):
+    Comment = apps.get_model('accounts', 'Comment')
+    Post = apps.get_model('accounts', 'Post')
+    count = (Comment.objects.filter(post=OuterRef('pk'), active=True).order_by()
+             .values('post').annotate(count=Count('*')).values('count'))
+    Post.objects.filter(comments__active=True).distinct().update(comment_count=Coalesce(Subquery(count), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_post_import_id'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[migrations.AddField(model_name='post', name='comment_count', field=FIELD)],
+            database_operations=[migrations.RunPython(add_column, remove_column)],
+        ),
+        migrations.RunPython(backfill_comment_counts, migrations.RunPython.noop),
+    ]
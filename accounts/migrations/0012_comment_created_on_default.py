@@ -0,0 +1,25 @@
+# Generated by Django 5.0.7 on 2026-10-17 15:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_post_comment_count'),
+    ]
+
+    operations = [
+        # auto_now_add -> default=timezone.now, so that comments written later by the write-behind buffer keep the
+        # time they were posted. Only changes how Django fills the column, so it is applied to the state only.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='comment',
+                    name='created_on',
+                    field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.7 on 2026-10-17 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_comment_created_on_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('post', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='accounts.post')),
+            ],
+            options={
+                'verbose_name_plural': 'post stats',
+                'indexes': [models.Index(fields=['day', 'post', 'views'], name='poststats_day_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='poststats',
+            constraint=models.UniqueConstraint(fields=('post', 'day'), name='poststats_post_day_uniq'),
+        ),
+    ]
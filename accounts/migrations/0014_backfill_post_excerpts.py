@@ -0,0 +1,31 @@
+# Generated by Django 5.0.7 on 2026-10-17 18:05
+
+from django.db import migrations
+
+from accounts.models import make_excerpt
+
+BATCH_SIZE = 1000
+
+
+def backfill_excerpts(apps, schema_editor):
+    # 0006_post_excerpt added the column empty; the backfill_excerpts command does the same for large tables
+    # outside a deploy.
+    Post = apps.get_model('accounts', 'Post')
+    posts = Post.objects.filter(excerpt='').only('content', 'excerpt').order_by('pk')
+    last_pk = 0
+    while batch := list(posts.filter(pk__gt=last_pk)[:BATCH_SIZE]):
+        for post in batch:
+            post.excerpt = make_excerpt(post.content)
+        Post.objects.bulk_update(batch, ['excerpt'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_poststats'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_excerpts, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,9 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from django.utils.text import Truncator
 from PIL import Image
 
 
@@ -52,29 +55,155 @@ class Category(models.Model):
         return self.name
 
 
+EXCERPT_WORDS = 30
+
+
+def make_excerpt(content):
+    """Return the listing-card excerpt for a post body, as truncatewords:30 would render it."""
+    return Truncator(content).words(EXCERPT_WORDS, truncate=' …')
+
+
 class Post(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
+    # Denormalized from content on save() so listings never have to load or tokenize the full body.
+    excerpt = models.TextField(blank=True, default='', editable=False)
     author = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # A default rather than auto_now_add, so that imported posts can keep their original publication date.
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
+    # Identifier of the post in the source it was imported from (see the import_posts command); lets a
+    # re-run of an import skip the posts it already loaded.
+    import_id = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    # Number of active comments, kept up to date by accounts.signals, so that pages can show it without a COUNT.
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # latest_blog_posts: newest first, optionally filtered by category, paged on (created_at, id).
+            models.Index(fields=['-created_at', '-id'], name='post_created_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], name='post_category_created_idx'),
+            # profile: the author's own posts, newest first.
+            models.Index(fields=['author', '-created_at', '-id'], name='post_author_created_idx'),
+            # Incremental exports: posts changed since a given time.
+            models.Index(fields=['updated_at', 'id'], name='post_updated_idx'),
+        ]
+        constraints = [
+            # Partial, so SQLite can add it with CREATE UNIQUE INDEX instead of rebuilding the table, which would
+            # drop the full-text search triggers.
+            models.UniqueConstraint(fields=['import_id'], condition=models.Q(import_id__isnull=False),
+                                    name='post_import_id_uniq'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        deferred = self.get_deferred_fields()
+        if 'content' not in deferred:
+            self.excerpt = make_excerpt(self.content)
+        if (kwargs.get('update_fields') is None and not kwargs.get('force_insert') and not self._state.adding
+                and self.pk is not None):
+            # comment_count is kept up to date with UPDATE statements (see accounts.signals); writing back the
+            # value loaded with this instance would undo comments counted since.
+            kwargs['update_fields'] = [field.attname for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.attname not in deferred
+                                       and field.name != 'comment_count']
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(Post, related_name='comments', on_delete=models.CASCADE)
     name = models.CharField(max_length=80)
     email = models.EmailField()
     body = models.TextField()
-    created_on = models.DateTimeField(auto_now_add=True)
+    created_on = models.DateTimeField(default=timezone.now, editable=False)
     active = models.BooleanField(default=True)
 
     class Meta:
         ordering = ['created_on']
+        indexes = [
+            # post_detail: active comments of a post, oldest first. Partial, because Django renders
+            # active=True as a bare boolean term which a plain (post, active, created_on) index can't seek on.
+            models.Index(fields=['post', 'created_on'], condition=models.Q(active=True),
+                         name='comment_post_active_idx'),
+            # Incremental exports: comments created since a given time.
+            models.Index(fields=['created_on', 'id'], name='comment_created_idx'),
+        ]
 
     def __str__(self):
         return f'Comment by {self.name} on {self.post}'
 
+
+def active_comment_count():
+    """
+        A subquery counting the active comments of the outer Post, to recompute stored counts in one statement:
+        Post.objects.filter(...).update(comment_count=active_comment_count()).
+        """
+    count = (Comment.objects.filter(post=OuterRef('pk'), active=True).order_by()
+             .values('post').annotate(count=Count('*')).values('count'))
+    return Coalesce(Subquery(count), 0)
+
+
+class QueuedTask(models.Model):
+    """
+        A background task waiting in (or processed from) the durable queue, see accounts.taskqueue.
+        """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    dedup_key = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # run_tasks: the next pending task that is due.
+            models.Index(fields=['status', 'run_after', 'id'], name='task_due_idx'),
+        ]
+        constraints = [
+            # Deduplication: at most one pending copy of the same task.
+            models.UniqueConstraint(fields=['dedup_key'], condition=models.Q(status='pending'),
+                                    name='task_pending_dedup_key'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
+
+
+class PostStats(models.Model):
+    """
+        Views of a post on one day (UTC), merged in by the page-view counter, see accounts.view_counts.
+        """
+    # Not indexed on its own: the (post, day) unique constraint below serves lookups by post.
+    post = models.ForeignKey(Post, related_name='stats', on_delete=models.CASCADE, db_index=False)
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'post stats'
+        indexes = [
+            # popular: views per post since a given day, read from the index alone.
+            models.Index(fields=['day', 'post', 'views'], name='poststats_day_idx'),
+        ]
+        constraints = [
+            # The conflict target of the counter's upsert.
+            models.UniqueConstraint(fields=['post', 'day'], name='poststats_post_day_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} on {self.day}: {self.views} views'
@@ -0,0 +1,148 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def encode_cursor(created_at, pk):
+    """
+        Build an opaque, URL-safe cursor token from a row's (created_at, id) sort key.
+        """
+    raw = f'{created_at.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+        Reverse encode_cursor(). Raises ValueError if the token is malformed.
+        """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (TypeError, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
+class KeysetPage:
+    """
+        A single page of results produced by keyset (cursor) pagination.
+
+        It is iterable like a Django Page, but instead of page numbers it exposes opaque
+        next/previous cursors built from the (key_field, id) key of its last/first row.
+        """
+
+    def __init__(self, object_list, has_next, has_previous, key_field='created_at'):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.key_field = key_field
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def next_cursor(self):
+        if self.has_next and self.object_list:
+            last = self.object_list[-1]
+            return encode_cursor(getattr(last, self.key_field), last.pk)
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous and self.object_list:
+            first = self.object_list[0]
+            return encode_cursor(getattr(first, self.key_field), first.pk)
+        return None
+
+
+def _keyset_query(queryset, per_page, after, before):
+    """
+        Build the query for one keyset page. Returns (sliced queryset, backwards, has_after_key).
+        """
+    try:
+        after_key = decode_cursor(after) if after else None
+        before_key = decode_cursor(before) if before else None
+    except ValueError:
+        after_key = before_key = None
+
+    if before_key is not None:
+        created_at, pk = before_key
+        queryset = queryset.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+        ).order_by('created_at', 'id')
+        return queryset[:per_page + 1], True, False
+
+    if after_key is not None:
+        created_at, pk = after_key
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+    return queryset.order_by('-created_at', '-id')[:per_page + 1], False, after_key is not None
+
+
+def _keyset_page(rows, per_page, backwards, has_after_key):
+    if backwards:
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page]
+        rows.reverse()
+        return KeysetPage(rows, has_next=True, has_previous=has_previous)
+    return KeysetPage(rows[:per_page], has_next=len(rows) > per_page, has_previous=has_after_key)
+
+
+def keyset_paginate(queryset, per_page, after=None, before=None):
+    """
+        Paginate a queryset newest-first on (created_at, id) without COUNT(*) or OFFSET.
+
+        Parameters:
+        - queryset: an unordered queryset of rows with a created_at field
+        - per_page: number of rows per page
+        - after: cursor token; return the rows that come after it (older rows)
+        - before: cursor token; return the rows that come before it (newer rows)
+
+        A malformed cursor is ignored and the first page is returned instead.
+        One extra row is fetched to find out whether a further page exists.
+
+        Returns:
+        - KeysetPage
+        """
+    queryset, backwards, has_after_key = _keyset_query(queryset, per_page, after, before)
+    return _keyset_page(list(queryset), per_page, backwards, has_after_key)
+
+
+async def akeyset_paginate(queryset, per_page, after=None, before=None):
+    """Async version of keyset_paginate(), using the async ORM."""
+    queryset, backwards, has_after_key = _keyset_query(queryset, per_page, after, before)
+    return _keyset_page([row async for row in queryset], per_page, backwards, has_after_key)
+
+
+def _forward_query(queryset, per_page, key_field, after):
+    try:
+        after_key = decode_cursor(after) if after else None
+    except ValueError:
+        after_key = None
+    if after_key is not None:
+        value, pk = after_key
+        queryset = queryset.filter(Q(**{f'{key_field}__gt': value}) | Q(**{key_field: value, 'pk__gt': pk}))
+    return queryset.order_by(key_field, 'id')[:per_page + 1]
+
+
+def keyset_paginate_forward(queryset, per_page, key_field, after=None):
+    """
+        Paginate a queryset oldest-first on (key_field, id), forwards only, without COUNT(*) or OFFSET.
+
+        Used for comment threads, which are read from the top and continued with "Load more". A malformed
+        cursor is ignored and the first page is returned instead.
+
+        Returns:
+        - KeysetPage (has_previous is always False)
+        """
+    rows = list(_forward_query(queryset, per_page, key_field, after))
+    return KeysetPage(rows[:per_page], has_next=len(rows) > per_page, has_previous=False, key_field=key_field)
+
+
+async def akeyset_paginate_forward(queryset, per_page, key_field, after=None):
+    """Async version of keyset_paginate_forward(), using the async ORM."""
+    rows = [row async for row in _forward_query(queryset, per_page, key_field, after)]
+    return KeysetPage(rows[:per_page], has_next=len(rows) > per_page, has_previous=False, key_field=key_field)
@@ -0,0 +1,130 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_ALIAS = 'replica'
+# Session key holding the time until which the session reads from the primary database.
+PINNED_UNTIL_SESSION_KEY = '_replica_pinned_until'
+
+# Routing state of the current request, {'replica': bool, 'wrote': bool}, or None outside a request.
+_request_state = ContextVar('replica_request_state', default=None)
+
+
+class ReadReplicaRouter:
+    """
+        Send reads to the 'replica' database inside views decorated with @read_from_replica, and everything
+        else, including every write, to 'default'. The per-request state it routes on is set up by
+        accounts.middleware.ReplicaRoutingMiddleware.
+
+        Nothing is routed to the replica unless a 'replica' alias is configured in DATABASES.
+        """
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state and state.get('replica') and REPLICA_ALIAS in connections.settings:
+            return REPLICA_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        mark_written()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica is a copy of 'default', so objects read from either may be related.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # The replica gets its schema through replication.
+        return db == DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def track_writes():
+    """
+        Set up routing for one request. Yields a dict whose 'wrote' item tells, once the block exits, whether
+        anything was written to the database inside it.
+        """
+    state = {'replica': False, 'wrote': False}
+    token = _request_state.set(state)
+    try:
+        yield state
+    finally:
+        _request_state.reset(token)
+
+
+def mark_written():
+    """
+        Record that the current request wrote to the database, so that its session reads from the primary for a
+        while. Called for every write routed here, and for writes that are deferred past the end of the request.
+        """
+    state = _request_state.get()
+    if state is not None:
+        state['wrote'] = True
+
+
+def pin_until():
+    """The PINNED_UNTIL_SESSION_KEY value that pins a session to the primary database from now on."""
+    return time.time() + settings.REPLICA_STICKY_SECONDS
+
+
+@contextmanager
+def _replica_reads(state, pinned):
+    previous = state.get('replica', False)
+    # Inside primary_reads() a view decorated with @read_from_replica still reads from the primary.
+    state['replica'] = not pinned and not state.get('primary', False)
+    try:
+        yield
+    finally:
+        state['replica'] = previous
+
+
+def read_from_replica(view):
+    """
+        Let a read-only view (sync or async) read from the replica, unless the request's session wrote to the
+        database within the last REPLICA_STICKY_SECONDS.
+        """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            state = _request_state.get()
+            if state is None:
+                return await view(request, *args, **kwargs)
+            pinned = await sync_to_async(request.session.get)(PINNED_UNTIL_SESSION_KEY, 0) > time.time()
+            with _replica_reads(state, pinned):
+                return await view(request, *args, **kwargs)
+    else:
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            state = _request_state.get()
+            if state is None:
+                return view(request, *args, **kwargs)
+            with _replica_reads(state, request.session.get(PINNED_UNTIL_SESSION_KEY, 0) > time.time()):
+                return view(request, *args, **kwargs)
+    return inner
+
+
+@contextmanager
+def primary_reads():
+    """
+        Read from the primary database inside this block, even in a view decorated with @read_from_replica.
+
+        Used to fill long-lived caches, including the pages accounts.middleware.AnonymousPageCacheMiddleware
+        renders on a miss: filled from a replica that lags behind, they would keep serving the old data long after
+        the replica caught up.
+        """
+    state = _request_state.get()
+    if state is None:
+        yield
+        return
+    previous = state.get('primary', False)
+    state['primary'] = True
+    try:
+        with _replica_reads(state, pinned=True):
+            yield
+    finally:
+        state['primary'] = previous
@@ -0,0 +1,75 @@
+import re
+from collections import namedtuple
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+SearchResult = namedtuple('SearchResult', ['pk', 'title', 'snippet', 'created_at', 'author_first_name',
+                                           'author_last_name'])
+
+# Control characters used as highlight markers inside SQLite, so the post text can be HTML-escaped
+# before the markers are swapped for <mark> tags.
+_MARK_START, _MARK_END = '\x02', '\x03'
+
+SEARCH_SQL = f"""
+    SELECT p.id,
+           highlight(accounts_post_fts, 0, '{_MARK_START}', '{_MARK_END}'),
+           snippet(accounts_post_fts, 1, '{_MARK_START}', '{_MARK_END}', '…', 32),
+           p.created_at, u.first_name, u.last_name
+    FROM accounts_post_fts
+    JOIN accounts_post p ON p.id = accounts_post_fts.rowid
+    JOIN accounts_customuser u ON u.id = p.author_id
+    WHERE accounts_post_fts MATCH %s
+    ORDER BY bm25(accounts_post_fts, 10.0, 1.0)
+    LIMIT %s OFFSET %s
+"""
+
+
+def build_match_query(query):
+    """
+        Turn free text typed by a visitor into an FTS5 MATCH expression.
+
+        Every word is quoted, so FTS5 operators and punctuation in the input can't cause syntax errors;
+        the words are ANDed together and the last one is matched as a prefix. Returns '' if there are
+        no searchable words.
+        """
+    terms = re.findall(r'\w+', query)
+    if not terms:
+        return ''
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def _highlight(text):
+    return mark_safe(escape(text).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>'))
+
+
+def search_posts(query, limit, offset=0):
+    """
+        Full-text search over post titles and bodies, best matches first.
+
+        Title matches are weighted above body matches. The matched terms are wrapped in <mark> tags in
+        the returned title and snippet, which are otherwise HTML-escaped and safe to render.
+
+        Parameters:
+        - query: the text typed by the visitor
+        - limit: maximum number of results to return
+        - offset: number of results to skip
+
+        Returns:
+        - a list of SearchResult tuples
+        """
+    match = build_match_query(query)
+    if not match:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(SEARCH_SQL, [match, limit, offset])
+        rows = cursor.fetchall()
+    return [
+        SearchResult(pk, _highlight(title), _highlight(snippet),
+                     connection.ops.convert_datetimefield_value(created_at, None, connection),
+                     first_name, last_name)
+        for pk, title, snippet, created_at, first_name, last_name in rows
+    ]
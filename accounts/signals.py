@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_version
+from .models import Category, Comment, CustomUser, Post, active_comment_count
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    bump_version('post', instance.pk)
+    bump_version('categories', 'all')
+    bump_version('feeds', 'all')
+    bump_version('pages', 'all')
+
+
+def comments_changed(post_ids):
+    """
+        Recount the stored comment_count of the given posts and invalidate their cached pages. Called for every
+        saved or deleted comment, and by accounts.comment_buffer after a bulk insert, which sends no signals.
+        """
+    # Recounted rather than incremented, so that deleting, hiding or re-activating a comment is counted right too.
+    Post.objects.filter(pk__in=post_ids).update(comment_count=active_comment_count())
+    for post_id in post_ids:
+        bump_version('post', post_id)
+    bump_version('pages', 'all')
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_post_comments(sender, instance, **kwargs):
+    comments_changed([instance.post_id])
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    bump_version('categories', 'all')
+    bump_version('feeds', 'all')
+    bump_version('pages', 'all')
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def invalidate_author(sender, instance, update_fields=None, **kwargs):
+    # Logging in saves last_login only, which nothing cached depends on.
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    bump_version('author', instance.pk)
+    bump_version('feeds', 'all')
+    bump_version('pages', 'all')
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    pragmas = settings.SQLITE_PRAGMAS
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,97 @@
+import gzip
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger('accounts.static')
+
+# Content-Encoding -> file suffix of the precompressed copies, preferred first.
+ENCODINGS = {'br': '.br', 'gzip': '.gz'}
+
+# Text and font formats worth compressing; images, woff/woff2 and archives are compressed already.
+COMPRESSIBLE_EXTENSIONS = {
+    '.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html', '.xml', '.ico', '.ttf', '.otf', '.eot',
+}
+
+
+def available_encodings():
+    """The encodings build_static writes copies in: brotli only if the brotli package is installed."""
+    return [encoding for encoding in ENCODINGS if encoding != 'br' or brotli is not None]
+
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    # mtime=0 keeps the output identical from one build to the next.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+        ManifestStaticFilesStorage that also writes a gzip copy (name.gz), and a brotli copy (name.br) when the
+        brotli package is installed, next to every collected text asset, for PrecompressedStaticMiddleware to
+        serve without compressing per request.
+
+        Copies are only kept when at least min_saving smaller than the original and are rewritten only when
+        older than it. Missing files referenced from CSS or templates, like the source maps the AdminLTE
+        plugins point at, are left unhashed with a warning rather than failing collectstatic or the page.
+        """
+    manifest_strict = False
+    min_size = 256
+    min_saving = 0.05
+
+    def hashed_name(self, name, content=None, filename=None):
+        if content is None:
+            path = (filename or name).split('?', 1)[0].split('#', 1)[0].strip()
+            if not self.exists(path):
+                logger.warning('Static file %r is missing; leaving its references unhashed', path)
+                return name
+        return super().hashed_name(name, content, filename)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = {name for pair in self.hashed_files.items() for name in pair}
+        names = sorted(name for name in names if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS)
+        # zlib and brotli release the GIL, so the files compress in parallel.
+        with ThreadPoolExecutor() as pool:
+            list(pool.map(self.compress_file, names))
+
+    def compress_file(self, name):
+        """
+            Write the compressed copies of a collected file, or delete stale ones that no longer pay off.
+
+            Returns:
+            - {encoding: size in bytes} of the copies kept
+            """
+        path = self.path(name)
+        if not os.path.isfile(path):
+            return {}
+        mtime = os.path.getmtime(path)
+        data = None
+        sizes = {}
+        for encoding in available_encodings():
+            target = path + ENCODINGS[encoding]
+            if os.path.exists(target) and os.path.getmtime(target) >= mtime:
+                sizes[encoding] = os.path.getsize(target)
+                continue
+            if data is None:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            compressed = _compress(data, encoding) if len(data) >= self.min_size else None
+            if compressed is None or len(compressed) > len(data) * (1 - self.min_saving):
+                if os.path.exists(target):
+                    os.remove(target)
+                continue
+            with open(target, 'wb') as f:
+                f.write(compressed)
+            sizes[encoding] = len(compressed)
+        return sizes
@@ -0,0 +1,216 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger('accounts.tasks')
+
+# Registered task functions by name.
+_registry = {}
+
+_executor = None
+_executor_lock = threading.Lock()
+# Dedup keys of tasks queued on the thread pool that have not started running yet.
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def task(func=None, *, max_retries=None, retry_delay=None):
+    """
+        Register a function as a background task, e.g.
+
+            @task
+            def refresh_post_caches(post_id): ...
+
+            enqueue(refresh_post_caches, post.pk)
+
+        Arguments must be JSON-serializable so that the task can be stored by the 'database' backend.
+        max_retries and retry_delay default to settings.TASKS_MAX_RETRIES and settings.TASKS_RETRY_DELAY.
+        """
+    def decorator(func):
+        func.task_name = f'{func.__module__}.{func.__qualname__}'
+        func.max_retries = max_retries
+        func.retry_delay = retry_delay
+        _registry[func.task_name] = func
+        return func
+
+    return decorator(func) if func is not None else decorator
+
+
+def get_task(name):
+    """Return the registered task function called name, importing its module if needed."""
+    if name not in _registry:
+        import_string(name)
+    return _registry[name]
+
+
+def dedup_key(name, args=(), kwargs=None):
+    """The key under which identical queued calls of a task are collapsed into one."""
+    return f'{name}:{json.dumps([list(args), kwargs or {}], sort_keys=True)}'[:255]
+
+
+def enqueue(func, *args, **kwargs):
+    """
+        Queue func(*args, **kwargs) to run in the background once the current transaction commits.
+
+        Nothing is queued if the transaction rolls back. A call identical to one that is already queued and has
+        not started yet is dropped, so a burst of saves of the same post runs its follow-up work once.
+        """
+    transaction.on_commit(lambda: _submit(func.task_name, list(args), kwargs))
+
+
+def _submit(name, args, kwargs):
+    backend = settings.TASKS_BACKEND
+    key = dedup_key(name, args, kwargs)
+    if backend == 'immediate':
+        run_task(name, args, kwargs)
+    elif backend == 'database':
+        from .models import QueuedTask
+
+        try:
+            with transaction.atomic():
+                QueuedTask.objects.create(name=name, args=args, kwargs=kwargs, dedup_key=key)
+        except IntegrityError:
+            logger.debug('Task %s is already queued', key)
+    elif backend == 'thread':
+        with _pending_lock:
+            if key in _pending:
+                logger.debug('Task %s is already queued', key)
+                return
+            _pending.add(key)
+        try:
+            _get_executor().submit(_run_in_thread, name, args, kwargs, key, 0)
+        except RuntimeError:
+            # The pool no longer takes tasks once the interpreter is shutting down, e.g. when the write-behind
+            # buffers flush from their atexit hooks; run the task in this thread rather than lose it.
+            with _pending_lock:
+                _pending.discard(key)
+            logger.info('Task pool is shut down; running %s inline', name)
+            try:
+                run_task(name, args, kwargs)
+            except Exception:
+                logger.exception('Task %s failed', name)
+    else:
+        raise ValueError(f'Unknown TASKS_BACKEND {backend!r}')
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.TASKS_WORKERS, thread_name_prefix='task')
+        return _executor
+
+
+def _run_in_thread(name, args, kwargs, key, attempt):
+    with _pending_lock:
+        _pending.discard(key)
+    try:
+        run_task(name, args, kwargs)
+    except Exception:
+        delay = _retry_delay(name, attempt)
+        if delay is None:
+            logger.exception('Task %s failed after %d attempts', name, attempt + 1)
+        else:
+            logger.warning('Task %s failed, retrying in %.1fs', name, delay, exc_info=True)
+            time.sleep(delay)
+            _get_executor().submit(_run_in_thread, name, args, kwargs, key, attempt + 1)
+    finally:
+        # Worker threads outlive requests, so nothing else would close their connections.
+        connections.close_all()
+
+
+def _retry_delay(name, attempt):
+    """Seconds to wait before retrying a task that failed on attempt (0-based), or None to give up."""
+    func = get_task(name)
+    max_retries = settings.TASKS_MAX_RETRIES if func.max_retries is None else func.max_retries
+    if attempt >= max_retries:
+        return None
+    retry_delay = settings.TASKS_RETRY_DELAY if func.retry_delay is None else func.retry_delay
+    return retry_delay * 2 ** attempt
+
+
+def run_task(name, args, kwargs):
+    """Run one task now, in the calling thread."""
+    get_task(name)(*args, **kwargs)
+
+
+def run_next_queued_task():
+    """
+        Claim and run the next due task from the durable queue ('database' backend).
+
+        A task is claimed by moving it from pending to running with a conditional UPDATE, so several run_tasks
+        workers can share the queue. On failure the task goes back to pending with an exponential back-off, or
+        to failed once its retries are used up.
+
+        Returns:
+        - the QueuedTask that was run, or None if no task was due
+        """
+    from .models import QueuedTask
+
+    while True:
+        queued = (QueuedTask.objects.filter(status=QueuedTask.PENDING, run_after__lte=timezone.now())
+                  .order_by('run_after', 'id').first())
+        if queued is None:
+            return None
+        claimed = (QueuedTask.objects.filter(pk=queued.pk, status=QueuedTask.PENDING)
+                   .update(status=QueuedTask.RUNNING, attempts=queued.attempts + 1, updated_at=timezone.now()))
+        if claimed:
+            break
+
+    try:
+        run_task(queued.name, queued.args, queued.kwargs)
+    except Exception as exc:
+        delay = _retry_delay(queued.name, queued.attempts)
+        queued.attempts += 1
+        queued.last_error = f'{type(exc).__name__}: {exc}'
+        if delay is None:
+            logger.exception('Task %s failed after %d attempts', queued.name, queued.attempts)
+            queued.status = QueuedTask.FAILED
+        else:
+            logger.warning('Task %s failed, retrying in %.1fs', queued.name, delay, exc_info=True)
+            queued.status = QueuedTask.PENDING
+            queued.run_after = timezone.now() + timedelta(seconds=delay)
+        try:
+            with transaction.atomic():
+                queued.save(update_fields=['status', 'attempts', 'last_error', 'run_after', 'updated_at'])
+        except IntegrityError:
+            # An identical call was queued while this one ran; that copy will do the work.
+            queued.status = QueuedTask.FAILED
+            queued.last_error = 'Superseded'
+            queued.save(update_fields=['status', 'attempts', 'last_error', 'updated_at'])
+    else:
+        queued.attempts += 1
+        queued.status = QueuedTask.DONE
+        queued.save(update_fields=['status', 'attempts', 'updated_at'])
+    return queued
+
+
+def requeue_stale_tasks(older_than):
+    """
+        Put tasks left running for more than older_than seconds (their worker died) back in the queue.
+
+        Returns:
+        - the number of tasks requeued
+        """
+    from .models import QueuedTask
+
+    requeued = 0
+    stale = QueuedTask.objects.filter(status=QueuedTask.RUNNING,
+                                      updated_at__lt=timezone.now() - timedelta(seconds=older_than))
+    for queued in stale:
+        try:
+            with transaction.atomic():
+                QueuedTask.objects.filter(pk=queued.pk).update(status=QueuedTask.PENDING, updated_at=timezone.now())
+            requeued += 1
+        except IntegrityError:
+            # An identical call is already queued again.
+            QueuedTask.objects.filter(pk=queued.pk).update(status=QueuedTask.FAILED, last_error='Superseded')
+    return requeued
@@ -0,0 +1,21 @@
+from django.http import Http404
+
+from .cache import cached_post_detail, category_choices
+from .taskqueue import task
+
+
+@task
+def refresh_post_caches(post_id):
+    """
+        Re-render the caches a post change has just invalidated, so that the next reader finds them warm.
+
+        The invalidation itself (the version bumps in accounts.signals) stays synchronous: only the rebuild is
+        moved off the request.
+        """
+    from .views import render_post_detail_block
+
+    try:
+        cached_post_detail(post_id, lambda: render_post_detail_block(post_id))
+    except Http404:
+        return  # Deleted in the meantime.
+    category_choices()
@@ -1,14 +1,70 @@
-from django.test import TestCase
+import gzip
+import importlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.test import Client
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.template import Context, Template, engines
+from django.template.loader import get_template
+from django.utils import timezone
 
 from .forms import CommentForm, CustomUserChangeForm, PostForm
-from .models import Post, Category, Comment
+from .cache import category_choices, get_version
+from .checks import check_shared_cache
+from .comment_buffer import CommentBuffer, comment_buffer
+from .middleware import page_cache_key, page_cache_stats, reset_page_cache_stats
+from .models import Post, PostStats, Category, Comment, QueuedTask, active_comment_count, make_excerpt
+from .search import search_posts
+from .taskqueue import dedup_key, enqueue, run_next_queued_task, task
+from .throttle import login_throttle_stats, reset_login_throttle_stats
+from .view_counts import popular_post_ids, view_counter
+from .views import COMMENTS_PER_PAGE, SEARCH_MAX_PAGES, SEARCH_RESULTS_PER_PAGE
+from .warmup import warm_templates
 
 User = get_user_model()
 
 
+class QueryBudgetMixin:
+    """
+        TestCase mixin that pins the maximum number of SQL queries a block of code may run.
+
+        Usage:
+            with self.assertMaxQueries(2):
+                self.client.get(url)
+        """
+
+    @contextmanager
+    def assertMaxQueries(self, limit, using=DEFAULT_DB_ALIAS):
+        with CaptureQueriesContext(connections[using]) as ctx:
+            yield ctx
+        executed = len(ctx.captured_queries)
+        if executed > limit:
+            queries = '\n'.join(f'{i}. {q["sql"]}' for i, q in enumerate(ctx.captured_queries, start=1))
+            self.fail(f'{executed} queries executed, budget is {limit}:\n{queries}')
+
+
 class BlogPostModelTest(TestCase):
 
     def setUp(self):
@@ -171,6 +227,1478 @@ class CommentViewTest(TestCase):
             'email': 'commenter@example.com',
             'body': 'Test Comment',
         }
-        response = self.client.post(url, data=form_data)
+        with mock.patch('accounts.views.cached_post_detail') as cached_post_detail:
+            response = self.client.post(url, data=form_data)
+        # The page is not rendered in the POST; re-rendering the cached block is left to the queued task.
+        cached_post_detail.assert_not_called()
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        response = self.client.get(url)
+        self.assertContains(response, 'Your comment has been added!')
+        self.assertContains(response, 'Test Comment')
+
+
+class KeysetPaginationTest(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email='testuser@example.com', password='password123')
+        self.category = Category.objects.create(name='Test Category')
+        self.other_category = Category.objects.create(name='Other Category')
+        for i in range(12):
+            Post.objects.create(
+                title=f'Post {i}', content='Test Content', author=self.user,
+                category=self.category if i % 2 else self.other_category)
+        self.url = reverse('latest_blog_posts')
+
+    def _walk(self, params):
+        seen = []
+        page_obj = self.client.get(self.url, params).context['page_obj']
+        seen.extend(post.pk for post in page_obj)
+        while page_obj.has_next:
+            page_obj = self.client.get(self.url, dict(params, after=page_obj.next_cursor)).context['page_obj']
+            seen.extend(post.pk for post in page_obj)
+        return seen, page_obj
+
+    def test_cursor_walk_visits_every_post_newest_first(self):
+        seen, _ = self._walk({})
+        expected = list(Post.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_previous_cursor_returns_preceding_page(self):
+        first = self.client.get(self.url).context['page_obj']
+        second = self.client.get(self.url, {'after': first.next_cursor}).context['page_obj']
+        self.assertTrue(second.has_previous)
+        back = self.client.get(self.url, {'before': second.previous_cursor}).context['page_obj']
+        self.assertEqual([p.pk for p in back], [p.pk for p in first])
+        self.assertFalse(back.has_previous)
+
+    def test_cursor_walk_respects_category_filter(self):
+        seen, _ = self._walk({'category': self.category.id})
+        expected = list(Post.objects.filter(category=self.category)
+                        .order_by('-created_at', '-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_legacy_page_number_still_works(self):
+        response = self.client.get(self.url, {'page': 2})
+        expected = list(Post.objects.order_by('-created_at', '-id').values_list('pk', flat=True))[5:10]
+        self.assertEqual([p.pk for p in response.context['page_obj']], expected)
+        self.assertContains(response, '?after=')
+        self.assertContains(response, '?before=')
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        response = self.client.get(self.url, {'after': 'not-a-cursor!'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['page_obj'].has_previous)
+
+    def test_listing_does_not_count_rows(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        self.assertFalse(any(q['sql'].upper().startswith('SELECT COUNT(') for q in ctx.captured_queries))
+
+
+class QueryPlanTest(TestCase):
+    """
+        Runs EXPLAIN QUERY PLAN over every query the read views issue against a seeded database and fails
+        if a post or comment lookup degrades to a full table scan or needs a temporary B-tree to sort.
+        """
+
+    # The category filter dropdown deliberately lists every category.
+    FULL_SCAN_ALLOWED = {'accounts_category'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='testuser@example.com', password='password123')
+        cls.other_user = User.objects.create_user(email='other@example.com', password='password123')
+        cls.categories = Category.objects.bulk_create(Category(name=f'Category {i}') for i in range(5))
+        Post.objects.bulk_create(
+            Post(title=f'Post {i}', content='Test Content', author=cls.user if i % 3 else cls.other_user,
+                 category=cls.categories[i % 5])
+            for i in range(300))
+        cls.post = Post.objects.order_by('-id').first()
+        Comment.objects.bulk_create(
+            Comment(post=cls.post if i % 2 else Post.objects.order_by('id').first(), name='Commenter',
+                    email='commenter@example.com', body='Test Comment', active=bool(i % 5))
+            for i in range(200))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        cache.clear()
+
+    def assertQueryPlansUseIndexes(self, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
         self.assertEqual(response.status_code, 200)
+        selects = [q['sql'] for q in ctx.captured_queries if q['sql'].lstrip().upper().startswith('SELECT')]
+        self.assertTrue(selects)
+        with connection.cursor() as cursor:
+            for sql in selects:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                for row in cursor.fetchall():
+                    detail = row[-1]
+                    self.assertNotIn('TEMP B-TREE', detail, f'{sql}\n{detail}')
+                    words = detail.split()
+                    if words[0] == 'SCAN' and 'USING' not in words:
+                        self.assertIn(words[1], self.FULL_SCAN_ALLOWED, f'Full scan in:\n{sql}\n{detail}')
+        return response
+
+    def test_latest_blog_posts_plans(self):
+        url = reverse('latest_blog_posts')
+        response = self.assertQueryPlansUseIndexes(url)
+        self.assertQueryPlansUseIndexes(url, {'after': response.context['page_obj'].next_cursor})
+        response = self.assertQueryPlansUseIndexes(url, {'category': self.categories[1].id})
+        self.assertQueryPlansUseIndexes(url, {'category': self.categories[1].id,
+                                              'after': response.context['page_obj'].next_cursor})
+        self.assertQueryPlansUseIndexes(url, {'before': response.context['page_obj'].next_cursor})
+
+    def test_profile_plans(self):
+        self.client.login(email='testuser@example.com', password='password123')
+        self.assertQueryPlansUseIndexes(reverse('profile'))
+
+    def test_post_detail_plans(self):
+        self.assertQueryPlansUseIndexes(reverse('post_detail', args=[self.post.id]))
+
+    def test_post_comments_plans(self):
+        url = reverse('post_comments', args=[self.post.id])
+        response = self.assertQueryPlansUseIndexes(url)
+        self.assertQueryPlansUseIndexes(url, {'after': response.context['comments'].next_cursor})
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='testuser@example.com', password='password123')
+        cls.category = Category.objects.create(name='Test Category')
+        authors = [User.objects.create_user(email=f'author{i}@example.com', password='password123',
+                                            first_name=f'First{i}', last_name=f'Last{i}')
+                   for i in range(5)]
+        for i in range(10):
+            Post.objects.create(title=f'Post {i}', content='Test Content', author=authors[i % 5],
+                                category=cls.category)
+        cls.own_posts = [Post.objects.create(title=f'Own {i}', content='Test Content', author=cls.user)
+                         for i in range(3)]
+        for i in range(10):
+            Comment.objects.create(post=cls.own_posts[0], name='Commenter', email='commenter@example.com',
+                                   body=f'Comment {i}')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_latest_blog_posts_budget(self):
+        url = reverse('latest_blog_posts')
+        # Conditional GET validators, the page of posts and the category list.
+        with self.assertMaxQueries(3):
+            response = self.client.get(url)
+        self.assertContains(response, 'First')
+        # The category list is cached after the first request.
+        with self.assertMaxQueries(2):
+            self.client.get(url, {'category': self.category.id, 'after': response.context['page_obj'].next_cursor})
+
+    def test_profile_budget(self):
+        self.client.login(email='testuser@example.com', password='password123')
+        # Session and user lookups, then the user's posts.
+        with self.assertMaxQueries(3):
+            response = self.client.get(reverse('profile'))
+        self.assertContains(response, 'Own 2')
+
+    def test_post_detail_budget(self):
+        # Conditional GET validators, the post and its comments.
+        with self.assertMaxQueries(3):
+            response = self.client.get(reverse('post_detail', args=[self.own_posts[0].id]))
+        self.assertContains(response, 'Comment 9')
+
+
+class PostExcerptTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='testuser@example.com', password='password123')
+        self.content = ' '.join(f'word{i}' for i in range(50))
+
+    def test_excerpt_matches_truncatewords(self):
+        post = Post.objects.create(title='Test Title', content=self.content, author=self.user)
+        rendered = Template('{{ content|truncatewords:30 }}').render(Context({'content': self.content}))
+        self.assertEqual(post.excerpt, rendered)
+
+    def test_excerpt_follows_content_updates(self):
+        post = Post.objects.create(title='Test Title', content=self.content, author=self.user)
+        post.content = 'Short body'
+        post.save(update_fields=['content'])
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt, 'Short body')
+
+    def test_backfill_command(self):
+        Post.objects.bulk_create(
+            Post(title=f'Post {i}', content=self.content, author=self.user) for i in range(5))
+        self.assertEqual(Post.objects.filter(excerpt='').count(), 5)
+        call_command('backfill_excerpts', batch_size=2, stdout=StringIO())
+        self.assertFalse(Post.objects.filter(excerpt='').exists())
+        self.assertEqual(Post.objects.first().excerpt, make_excerpt(self.content))
+
+    def test_backfill_migration(self):
+        Post.objects.bulk_create(
+            Post(title=f'Post {i}', content=self.content, author=self.user) for i in range(3))
+        migration = importlib.import_module('accounts.migrations.0014_backfill_post_excerpts')
+        migration.backfill_excerpts(apps, None)
+        self.assertEqual(list(Post.objects.values_list('excerpt', flat=True).distinct()),
+                         [make_excerpt(self.content)])
+
+    def test_save_after_delete_inserts(self):
+        post = Post.objects.create(title='Test Title', content=self.content, author=self.user)
+        post.delete()
+        post.save()
+        self.assertTrue(Post.objects.filter(pk=post.pk, excerpt=make_excerpt(self.content)).exists())
+
+    def test_listing_does_not_load_content(self):
+        Post.objects.create(title='Test Title', content=self.content, author=self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('latest_blog_posts'))
+        self.assertContains(response, 'word29 …')
+        self.assertFalse(any('"content"' in q['sql'] for q in ctx.captured_queries))
+
+
+class PostSearchTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='testuser@example.com', password='password123', first_name='Test', last_name='User')
+        self.title_match = Post.objects.create(
+            title='Sourdough basics', content='Flour, water and patience.', author=self.user)
+        self.body_match = Post.objects.create(
+            title='Weekend notes', content='I baked sourdough <b>again</b> this weekend.', author=self.user)
+        Post.objects.create(title='Unrelated', content='Nothing to see here.', author=self.user)
+        self.url = reverse('search')
+
+    def test_results_are_ranked_title_first(self):
+        response = self.client.get(self.url, {'q': 'sourdough'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r.pk for r in response.context['results']], [self.title_match.pk, self.body_match.pk])
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        response = self.client.get(self.url, {'q': 'baked'})
+        self.assertContains(response, 'I <mark>baked</mark> sourdough &lt;b&gt;again&lt;/b&gt;')
+
+    def test_index_follows_updates_and_deletes(self):
+        self.body_match.content = 'Rye this time.'
+        self.body_match.save()
+        self.assertEqual([r.pk for r in search_posts('sourdough', 10)], [self.title_match.pk])
+        self.assertEqual([r.pk for r in search_posts('rye', 10)], [self.body_match.pk])
+        self.title_match.delete()
+        self.assertEqual(search_posts('sourdough', 10), [])
+
+    def test_prefix_and_operator_characters(self):
+        self.assertEqual(len(search_posts('sourd', 10)), 2)
+        response = self.client.get(self.url, {'q': 'sourdough" OR (NEAR'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.client.get(self.url, {'q': '""'}).context['results']), 0)
+
+    def test_pagination(self):
+        for i in range(SEARCH_RESULTS_PER_PAGE):
+            Post.objects.create(title=f'Sourdough {i}', content='More bread.', author=self.user)
+        first = self.client.get(self.url, {'q': 'sourdough'})
+        self.assertEqual(first.context['next_page'], 2)
+        second = self.client.get(self.url, {'q': 'sourdough', 'page': 2})
+        self.assertEqual(len(second.context['results']), 2)
+        self.assertIsNone(second.context['next_page'])
+
+    def test_page_beyond_limit_is_404(self):
+        self.assertEqual(self.client.get(self.url, {'q': 'sourdough', 'page': SEARCH_MAX_PAGES}).status_code, 200)
+        for page in (SEARCH_MAX_PAGES + 1, '99999999999999999999'):
+            self.assertEqual(self.client.get(self.url, {'q': 'sourdough', 'page': page}).status_code, 404)
+
+
+class PostDetailCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='testuser@example.com', password='password123', first_name='Test', last_name='User')
+        self.blog_post = Post.objects.create(title='Test Title', content='Test Content', author=self.user)
+        self.url = reverse('post_detail', args=[self.blog_post.id])
+
+    def test_warm_get_runs_no_queries(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Test Title')
+
+    def test_new_comment_appears_on_next_request(self):
+        self.client.get(self.url)
+        self.client.post(self.url, data={'name': 'Commenter', 'email': 'commenter@example.com', 'body': 'Fresh one'})
+        self.assertContains(self.client.get(self.url), 'Fresh one')
+
+    def test_post_and_author_changes_invalidate(self):
+        self.client.get(self.url)
+        self.blog_post.title = 'Edited Title'
+        self.blog_post.save()
+        self.assertContains(self.client.get(self.url), 'Edited Title')
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        self.assertContains(self.client.get(self.url), 'Renamed')
+
+    def test_deleted_post_is_not_served(self):
+        self.client.get(self.url)
+        self.blog_post.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class AnonymousPageCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        reset_page_cache_stats()
+        self.user = User.objects.create_user(
+            email='testuser@example.com', password='password123', first_name='Test', last_name='User')
+        self.blog_post = Post.objects.create(title='Test Title', content='Test Content', author=self.user)
+        self.url = reverse('latest_blog_posts')
+
+    def test_second_anonymous_request_is_a_hit(self):
+        self.assertEqual(self.client.get(self.url)['X-Page-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        self.assertContains(response, 'Test Title')
+        self.assertEqual(page_cache_stats(), {'hit': 1, 'miss': 1, 'stale': 0})
+
+    def test_authenticated_and_messages_requests_bypass_cache(self):
+        self.client.get(self.url)
+        self.client.cookies['messages'] = 'anything'
+        self.assertNotIn('X-Page-Cache', self.client.get(self.url))
+        del self.client.cookies['messages']
+        self.client.login(email='testuser@example.com', password='password123')
+        self.assertNotIn('X-Page-Cache', self.client.get(self.url))
+
+    def test_content_change_rerenders(self):
+        self.client.get(self.url)
+        Post.objects.create(title='Newer Title', content='Test Content', author=self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, 'Newer Title')
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_stale_page_served_while_another_request_rerenders(self):
+        self.client.get(self.url)
+        cache.add(page_cache_key(self.url) + ':lock', 1)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'STALE')
+        self.assertContains(response, 'Test Title')
+
+    def test_cold_key_waits_for_lock_holder(self):
+        self.client.get(self.url)
+        key = page_cache_key(self.url)
+        entry = cache.get(key)
+        cache.delete(key)
+        cache.add(key + ':lock', 1)
+        filler = threading.Timer(0.2, cache.set, (key, entry))
+        filler.start()
+        try:
+            with self.assertNumQueries(0):
+                response = self.client.get(self.url)
+        finally:
+            filler.join()
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+
+    def test_cached_form_gets_visitors_own_csrf_token(self):
+        url = reverse('post_detail', args=[self.blog_post.id])
+        Client().get(url)
+        client = Client(enforce_csrf_checks=True)
+        response = client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.content.decode()).group(1)
+        response = client.post(url, data={'name': 'Commenter', 'email': 'commenter@example.com',
+                                          'body': 'Test Comment', 'csrfmiddlewaretoken': token}, follow=True)
         self.assertContains(response, 'Your comment has been added!')
+
+
+@override_settings(REQUEST_TIMING_ENABLED=True, REQUEST_TIMING_SLOW_MS=60 * 1000)
+class RequestTimingMiddlewareTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='testuser@example.com', password='password123')
+        Post.objects.create(title='Test Title', content='Test Content', author=self.user)
+        self.url = reverse('latest_blog_posts')
+
+    def test_server_timing_header(self):
+        response = self.client.get(self.url)
+        metrics = dict(part.strip().split(';', 1) for part in response['Server-Timing'].split(','))
+        self.assertEqual(set(metrics), {'db', 'tpl', 'view', 'total'})
+        self.assertIn('desc="3 queries"', metrics['db'])
+        self.assertGreater(float(metrics['tpl'].split('=')[1]), 0)
+
+    def test_slow_requests_are_logged_with_sql(self):
+        with self.settings(REQUEST_TIMING_SLOW_MS=0), self.assertLogs('accounts.timing', 'WARNING') as logs:
+            self.client.get(self.url)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], self.url)
+        self.assertEqual(record['query_count'], 3)
+        self.assertTrue(any('accounts_post' in q['sql'] for q in record['queries']))
+
+    def test_disabled_middleware_is_not_loaded(self):
+        with self.settings(REQUEST_TIMING_ENABLED=False):
+            response = Client().get(self.url)
+        self.assertNotIn('Server-Timing', response)
+
+
+class BenchmarkCommandsTest(TestCase):
+
+    def test_seed_blog_is_reproducible(self):
+        call_command('seed_blog', users=3, categories=2, posts=20, comments=40, seed=7, batch_size=8,
+                     stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 20)
+        self.assertEqual(Comment.objects.count(), 40)
+        self.assertEqual(sum(Post.objects.values_list('comment_count', flat=True)),
+                         Comment.objects.filter(active=True).count())
+        self.assertFalse(Post.objects.filter(excerpt='').exists())
+        first = list(Post.objects.order_by('pk').values_list('title', flat=True))
+        Post.objects.all().delete()
+        call_command('seed_blog', users=3, categories=2, posts=20, comments=0, seed=7, stdout=StringIO())
+        self.assertEqual(User.objects.count(), 3)
+        self.assertEqual(list(Post.objects.order_by('pk').values_list('title', flat=True)), first)
+
+    def test_bench_views_writes_results(self):
+        call_command('seed_blog', users=2, categories=2, posts=10, comments=10, stdout=StringIO())
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'bench.json')
+            call_command('bench_views', requests=5, warmup=1, host='testserver', output=output, stdout=StringIO())
+            with open(output) as f:
+                results = json.load(f)['results']
+        self.assertEqual(set(results), {'latest_blog_posts', 'post_detail', 'profile', 'create_post'})
+        for summary in results.values():
+            self.assertEqual(summary['requests'], 5)
+            self.assertEqual(summary['errors'], 0)
+            self.assertLessEqual(summary['p50_ms'], summary['p99_ms'])
+
+    def test_bench_views_deletes_its_posts_unless_kept(self):
+        call_command('seed_blog', users=2, categories=2, posts=10, comments=0, stdout=StringIO())
+        options = {'views': ['create_post'], 'requests': 3, 'warmup': 1, 'host': 'testserver', 'stdout': StringIO()}
+        call_command('bench_views', **options)
+        self.assertEqual(Post.objects.count(), 10)
+        call_command('bench_views', keep=True, **options)
+        self.assertEqual(Post.objects.filter(title__startswith='Benchmark post').count(), 4)
+
+
+class ServerBenchmarkTest(TransactionTestCase):
+    # The benchmark queries from worker threads and an event loop, which only see committed rows.
+
+    def test_bench_servers_writes_results(self):
+        call_command('seed_blog', users=2, categories=2, posts=10, comments=10, stdout=StringIO())
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'bench.json')
+            call_command('bench_servers', requests=6, concurrency=2, host='testserver', output=output,
+                         stdout=StringIO())
+            with open(output) as f:
+                results = json.load(f)['results']
+        self.assertEqual(set(results), {f'{name} {server}' for name in ('latest_blog_posts', 'post_detail', 'profile')
+                                        for server in ('wsgi', 'asgi')})
+        for summary in results.values():
+            self.assertEqual(summary['requests'], 6)
+            self.assertEqual(summary['errors'], 0)
+
+
+class ImportPostsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='author@example.com', password='password123', first_name='Test', last_name='User')
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', newline='') as f:
+            f.write(content)
+        return path
+
+    def test_jsonl_import_is_idempotent(self):
+        rows = [
+            {'id': 1, 'title': 'First', 'content': 'Legacy body', 'author_email': 'Author@example.com',
+             'category': 'Travel', 'created_at': '2015-03-01T10:00:00'},
+            {'id': 2, 'title': 'Second', 'content': 'Another body', 'author_email': 'author@example.com',
+             'category': 'Travel'},
+            {'id': 3, 'title': 'Orphan', 'content': 'Body', 'author_email': 'nobody@example.com'},
+        ]
+        path = self.write('posts.jsonl', '\n'.join(json.dumps(row) for row in rows) + '\nnot json\n')
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_posts', path, batch_size=2, stdout=stdout, stderr=stderr)
+        self.assertIn('2 posts imported', stdout.getvalue())
+        self.assertIn('rows/s', stdout.getvalue())
+        self.assertIn("unknown author 'nobody@example.com'", stderr.getvalue())
+        self.assertIn('invalid JSON', stderr.getvalue())
+
+        first = Post.objects.get(import_id='1')
+        self.assertEqual(first.author, self.user)
+        self.assertEqual(first.category.name, 'Travel')
+        self.assertEqual(first.created_at.year, 2015)
+        self.assertEqual(first.excerpt, 'Legacy body')
+        self.assertEqual(Category.objects.filter(name='Travel').count(), 1)
+        self.assertEqual([result.title for result in search_posts('legacy', limit=10)], ['First'])
+
+        stdout = StringIO()
+        call_command('import_posts', path, batch_size=2, stdout=stdout, stderr=StringIO())
+        self.assertIn('0 posts imported', stdout.getvalue())
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_invalid_created_at_is_skipped(self):
+        rows = [
+            {'id': 1, 'title': 'Epoch', 'content': 'Body', 'author_email': 'author@example.com',
+             'created_at': 1425204000},
+            {'id': 2, 'title': 'Impossible', 'content': 'Body', 'author_email': 'author@example.com',
+             'created_at': '2015-13-01T10:00:00'},
+            {'id': 3, 'title': 'Valid', 'content': 'Body', 'author_email': 'author@example.com'},
+        ]
+        path = self.write('posts.jsonl', ''.join(json.dumps(row) + '\n' for row in rows))
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_posts', path, stdout=stdout, stderr=stderr)
+        self.assertIn('1 posts imported', stdout.getvalue())
+        self.assertIn('2 skipped', stdout.getvalue())
+        self.assertIn('invalid created_at 1425204000', stderr.getvalue())
+        self.assertEqual(list(Post.objects.values_list('title', flat=True)), ['Valid'])
+
+    def test_csv_import_without_ids(self):
+        path = self.write('posts.csv', 'title,content,author_email\r\nCSV post,"Body, with comma",new@example.com\r\n')
+        call_command('import_posts', path, create_authors=True, stdout=StringIO(), stderr=StringIO())
+        call_command('import_posts', path, create_authors=True, stdout=StringIO(), stderr=StringIO())
+        post = Post.objects.get()
+        self.assertEqual(post.content, 'Body, with comma')
+        self.assertTrue(post.import_id.startswith('sha1:'))
+        self.assertFalse(post.author.has_usable_password())
+
+    def test_batches_bound_queries(self):
+        path = self.write('posts.jsonl', ''.join(
+            json.dumps({'id': i, 'title': f'Post {i}', 'content': 'Body', 'author_email': 'author@example.com'})
+            + '\n' for i in range(50)))
+        # Two lookup maps, then per batch: one existence check and one INSERT inside a transaction.
+        with CaptureQueriesContext(connection) as ctx:
+            call_command('import_posts', path, batch_size=25, stdout=StringIO())
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 2)
+        self.assertEqual(Post.objects.count(), 50)
+
+
+class SQLiteFileDatabaseMixin:
+    """
+        Add a database alias, file_alias, backed by an SQLite file in a temporary directory for the test class.
+
+        The alias is only added in setUpClass, so the test runner, which sets up the databases tests name before
+        that, must not see it named: test classes use databases = '__all__'.
+        """
+    file_alias = None
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.database_dir = tempfile.TemporaryDirectory()
+        cls.database_path = os.path.join(cls.database_dir.name, f'{cls.file_alias}.sqlite3')
+        connections.settings[cls.file_alias] = {**connections['default'].settings_dict, 'NAME': cls.database_path}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[cls.file_alias].close()
+        del connections[cls.file_alias]
+        del connections.settings[cls.file_alias]
+        cls.database_dir.cleanup()
+
+
+@override_settings(TASKS_BACKEND='immediate')
+class ReadReplicaTest(SQLiteFileDatabaseMixin, TransactionTestCase):
+    # A second SQLite file stands in for the replica; replicate() copies the primary database into it.
+    file_alias = 'replica'
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(
+            email='testuser@example.com', password='password123', first_name='Test', last_name='User')
+        self.replicate()
+
+    def replicate(self):
+        connections['replica'].close()
+        connections['default'].ensure_connection()
+        replica = sqlite3.connect(self.database_path)
+        connections['default'].connection.backup(replica)
+        replica.close()
+
+    def reader(self):
+        """A logged-in client, whose pages are not served from the page cache."""
+        client = Client()
+        client.force_login(self.user)
+        return client
+
+    def test_listing_reads_from_replica(self):
+        reader = self.reader()
+        Post.objects.create(title='Fresh Post', content='Body', author=self.user)
+        self.assertNotContains(reader.get(reverse('latest_blog_posts')), 'Fresh Post')
+        self.replicate()
+        cache.clear()
+        self.assertContains(reader.get(reverse('latest_blog_posts')), 'Fresh Post')
+
+    def test_page_cache_is_filled_from_primary(self):
+        Post.objects.create(title='Fresh Post', content='Body', author=self.user)
+        response = Client().get(reverse('latest_blog_posts'))
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, 'Fresh Post')
+
+    def test_writer_reads_own_writes_from_primary(self):
+        reader = self.reader()
+        self.client.login(email='testuser@example.com', password='password123')
+        self.client.post(reverse('create_post'), {'title': 'My New Post', 'content': 'Body'})
+        self.assertEqual(Post.objects.using('replica').count(), 0)
+        self.assertContains(self.client.get(reverse('latest_blog_posts')), 'My New Post')
+        # Another session reads the replica, which has not caught up yet.
+        cache.clear()
+        self.assertNotContains(reader.get(reverse('latest_blog_posts')), 'My New Post')
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_pin_expires(self):
+        self.client.login(email='testuser@example.com', password='password123')
+        self.client.post(reverse('create_post'), {'title': 'My New Post', 'content': 'Body'})
+        self.assertNotContains(self.client.get(reverse('latest_blog_posts')), 'My New Post')
+
+    def test_comments_are_written_to_primary(self):
+        post = Post.objects.create(title='Test Title', content='Body', author=self.user)
+        self.replicate()
+        response = self.client.post(reverse('post_detail', args=[post.id]),
+                                    {'name': 'Commenter', 'email': 'c@example.com', 'body': 'First!'}, follow=True)
+        self.assertContains(response, 'First!')
+        self.assertEqual(Comment.objects.using('default').count(), 1)
+        self.assertEqual(Comment.objects.using('replica').count(), 0)
+        self.assertContains(self.client.get(reverse('post_detail', args=[post.id])), 'First!')
+
+
+class SQLiteProductionProfileTest(SQLiteFileDatabaseMixin, TransactionTestCase):
+    file_alias = 'stress'
+
+    def setUp(self):
+        self.override = override_settings(SQLITE_PRAGMAS=settings.SQLITE_PRODUCTION_PRAGMAS)
+        self.override.enable()
+        self.addCleanup(self.override.disable)
+        connections['stress'].close()
+        with connections['stress'].cursor() as cursor:
+            cursor.execute('CREATE TABLE IF NOT EXISTS stress_item (id INTEGER PRIMARY KEY, value TEXT)')
+            cursor.execute('DELETE FROM stress_item')
+
+    def test_production_settings_leave_base_databases_alone(self):
+        from myblog import settings as base_settings
+        with mock.patch.dict(os.environ, {'SECRET_KEY': 'test'}):
+            from myblog import settings_production
+        self.assertEqual(settings_production.DATABASES['default']['CONN_MAX_AGE'], 600)
+        self.assertEqual(base_settings.DATABASES['default']['CONN_MAX_AGE'], 0)
+        self.assertEqual(connections['default'].settings_dict['CONN_MAX_AGE'], 0)
+
+    def test_pragmas_applied_to_new_connections(self):
+        with connections['stress'].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+    def test_readers_progress_during_write_bursts(self):
+        writers, bursts, rows_per_burst = 2, 5, 200
+        writing = threading.Event()
+        stop = threading.Event()
+        reads_during_writes = []
+        errors = []
+
+        def write():
+            try:
+                for burst in range(bursts):
+                    with transaction.atomic(using='stress'):
+                        writing.set()
+                        with connections['stress'].cursor() as cursor:
+                            cursor.executemany('INSERT INTO stress_item (value) VALUES (%s)',
+                                               [(f'burst {burst}',)] * rows_per_burst)
+                        time.sleep(0.05)  # Hold the write transaction open, as a slow request would.
+                        writing.clear()
+                    time.sleep(0.01)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections['stress'].close()
+
+        def read():
+            count = 0
+            try:
+                while not stop.is_set():
+                    during_write = writing.is_set()
+                    with connections['stress'].cursor() as cursor:
+                        cursor.execute('SELECT COUNT(*) FROM stress_item')
+                        cursor.fetchone()
+                    if during_write and writing.is_set():
+                        count += 1
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                reads_during_writes.append(count)
+                connections['stress'].close()
+
+        readers = [threading.Thread(target=read) for _ in range(3)]
+        writer_threads = [threading.Thread(target=write) for _ in range(writers)]
+        for thread in readers + writer_threads:
+            thread.start()
+        for thread in writer_threads:
+            thread.join()
+        stop.set()
+        for thread in readers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertTrue(all(count > 0 for count in reads_during_writes), reads_during_writes)
+        with connections['stress'].cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM stress_item')
+            self.assertEqual(cursor.fetchone()[0], writers * bursts * rows_per_burst)
+
+
+class CommentPaginationTest(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='testuser@example.com', password='password123', first_name='Test', last_name='User')
+        self.post = Post.objects.create(title='Viral Post', content='Test Content', author=self.user)
+        Comment.objects.bulk_create(
+            Comment(post=self.post, name=f'Commenter {i}', email='c@example.com', body=f'Comment body {i}.')
+            for i in range(COMMENTS_PER_PAGE * 2 + 5))
+        Post.objects.update(comment_count=active_comment_count())
+
+    def test_first_page_inline_with_stored_count(self):
+        response = self.client.get(reverse('post_detail', args=[self.post.id]))
+        self.assertContains(response, f'Comments ({COMMENTS_PER_PAGE * 2 + 5})')
+        self.assertContains(response, 'Comment body 0.')
+        self.assertNotContains(response, f'Comment body {COMMENTS_PER_PAGE}.')
+        self.assertContains(response, 'Load more comments')
+
+    def test_detail_runs_no_count_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('post_detail', args=[self.post.id]))
+        self.assertFalse([q['sql'] for q in ctx.captured_queries if 'COUNT(' in q['sql']])
+
+    def test_fragment_pages_through_thread(self):
+        url = reverse('post_comments', args=[self.post.id])
+        seen = []
+        after = None
+        while True:
+            with self.assertMaxQueries(1):
+                response = self.client.get(url, {'after': after} if after else {})
+            page = response.context['comments']
+            seen.extend(comment.name for comment in page)
+            after = page.next_cursor
+            if not after:
+                break
+        self.assertEqual(seen, [f'Commenter {i}' for i in range(COMMENTS_PER_PAGE * 2 + 5)])
+        self.assertNotContains(response, 'Load more comments')
+
+    def test_fragment_of_missing_post_is_404(self):
+        response = self.client.get(reverse('post_comments', args=[self.post.id + 1000]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_comment_count_follows_comment_changes(self):
+        comment = Comment.objects.create(post=self.post, name='New', email='n@example.com', body='Hi')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, COMMENTS_PER_PAGE * 2 + 6)
+        comment.active = False
+        comment.save()
+        comment.delete()
+        Comment.objects.filter(post=self.post).first().delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, COMMENTS_PER_PAGE * 2 + 4)
+
+    def test_post_edit_keeps_comment_count(self):
+        post = Post.objects.get(pk=self.post.pk)
+        Comment.objects.create(post=self.post, name='New', email='n@example.com', body='Hi')
+        post.title = 'Edited'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, COMMENTS_PER_PAGE * 2 + 6)
+
+
+class CategoryChoicesTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='testuser@example.com', password='password123')
+        self.category = Category.objects.create(name='Test Category')
+        Post.objects.create(title='Test Title', content='Test Content', author=self.user, category=self.category)
+
+    def test_counts_loaded_once_until_invalidated(self):
+        with self.assertNumQueries(1):
+            categories = category_choices()
+        self.assertEqual([(c.name, c.post_count) for c in categories], [('Test Category', 1)])
+        with self.assertNumQueries(0):
+            category_choices()
+
+        Post.objects.create(title='Another', content='Test Content', author=self.user, category=self.category)
+        self.assertEqual(category_choices()[0].post_count, 2)
+        Category.objects.create(name='New Category')
+        self.assertEqual([c.name for c in category_choices()], ['Test Category', 'New Category'])
+
+    def test_dropdown_shows_counts_and_selection(self):
+        response = self.client.get(reverse('latest_blog_posts'), {'category': self.category.id})
+        self.assertContains(response, f'<option value="{self.category.id}" selected>Test Category (1)</option>',
+                            html=True)
+
+
+class ExportTest(TestCase):
+
+    def setUp(self):
+        self.staff = User.objects.create_user(email='staff@example.com', password='password123', is_staff=True)
+        self.user = User.objects.create_user(
+            email='testuser@example.com', password='password123', first_name='Test', last_name='User')
+        self.category = Category.objects.create(name='Test Category')
+        self.old_post = Post.objects.create(title='Old', content='Test Content', author=self.user,
+                                            category=self.category)
+        self.new_post = Post.objects.create(title='New', content='Test Content', author=self.user)
+        Post.objects.filter(pk=self.old_post.pk).update(updated_at=timezone.now() - timedelta(days=2))
+        Comment.objects.create(post=self.old_post, name='Commenter', email='commenter@example.com', body='Hi')
+
+    def _lines(self, response):
+        return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def test_staff_only(self):
+        self.client.login(email='testuser@example.com', password='password123')
+        self.assertEqual(self.client.get(reverse('export_posts')).status_code, 302)
+
+    def test_posts_ndjson_with_names(self):
+        self.client.login(email='staff@example.com', password='password123')
+        response = self.client.get(reverse('export_posts'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = self._lines(response)
+        self.assertEqual([row['title'] for row in rows], ['Old', 'New'])
+        self.assertEqual(rows[0]['category_name'], 'Test Category')
+        self.assertEqual((rows[0]['author_first_name'], rows[0]['author_last_name']), ('Test', 'User'))
+
+    def test_since_filter_and_json_format(self):
+        self.client.login(email='staff@example.com', password='password123')
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        response = self.client.get(reverse('export_posts'), {'since': since, 'format': 'json'})
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([row['title'] for row in rows], ['New'])
+        self.assertEqual(self.client.get(reverse('export_posts'), {'since': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('export_posts'), {'since': '2024-13-01T00:00:00'}).status_code, 400)
+        with self.assertRaisesMessage(CommandError, '--since must be an ISO 8601 datetime.'):
+            call_command('export_blog', 'posts', since='2024-13-01T00:00:00', stdout=StringIO())
+
+    def test_comments_and_command(self):
+        self.client.login(email='staff@example.com', password='password123')
+        rows = self._lines(self.client.get(reverse('export_comments')))
+        self.assertEqual([(row['post_id'], row['body']) for row in rows], [(self.old_post.pk, 'Hi')])
+        out = StringIO()
+        call_command('export_blog', 'posts', since=(timezone.now() - timedelta(days=1)).isoformat(), stdout=out)
+        self.assertEqual([json.loads(line)['title'] for line in out.getvalue().splitlines()], ['New'])
+
+    async def test_asgi_export_streams_from_async_generator(self):
+        await self.async_client.aforce_login(self.staff)
+        with warnings.catch_warnings():
+            # Django warns when it has to read a synchronous iterator to the end under ASGI.
+            warnings.simplefilter('error')
+            response = await self.async_client.get(reverse('export_posts'))
+            self.assertTrue(response.is_async)
+            content = b''.join([chunk async for chunk in response])
+        self.assertEqual([json.loads(line)['title'] for line in content.decode().splitlines()], ['Old', 'New'])
+
+
+class ConditionalGetTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(
+            email='testuser@example.com', password='password123', first_name='Test', last_name='User')
+        self.category = Category.objects.create(name='Test Category')
+        self.blog_post = Post.objects.create(title='Test Title', content='Test Content', author=self.user,
+                                             category=self.category)
+        self.detail_url = reverse('post_detail', args=[self.blog_post.id])
+        self.listing_url = reverse('latest_blog_posts')
+
+    def test_detail_etag_returns_304_without_rendering(self):
+        response = self.client.get(self.detail_url)
+        etag = response['ETag']
+        cache.delete(page_cache_key(self.detail_url))  # Make sure the 304 below does not come from the page cache.
+        with self.assertNumQueries(1):
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_detail_if_modified_since(self):
+        last_modified = self.client.get(self.detail_url)['Last-Modified']
+        cache.delete(page_cache_key(self.detail_url))
+        self.assertEqual(self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+    def test_deleted_comment_and_renamed_author_advance_last_modified(self):
+        comment = Comment.objects.create(post=self.blog_post, name='Commenter', email='commenter@example.com',
+                                         body='Hi')
+        for seconds, change in ((2, comment.delete), (4, lambda: self.user.save(update_fields=['first_name']))):
+            last_modified = self.client.get(self.detail_url)['Last-Modified']
+            cache.delete(page_cache_key(self.detail_url))
+            # HTTP dates have a precision of one second, so make the change happen later than the last one.
+            with mock.patch('accounts.cache.time.time_ns', return_value=time.time_ns() + seconds * 10 ** 9):
+                change()
+            response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['Last-Modified'], last_modified)
+            cache.delete(page_cache_key(self.detail_url))
+
+    def test_new_comment_changes_validators(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        Comment.objects.create(post=self.blog_post, name='Commenter', email='commenter@example.com', body='Hi')
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_listing_validators_follow_category_filter(self):
+        etag = self.client.get(self.listing_url, {'category': self.category.id})['ETag']
+        self.assertEqual(self.client.get(self.listing_url, {'category': self.category.id},
+                                         HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Post.objects.create(title='Another', content='Test Content', author=self.user, category=self.category)
+        self.assertEqual(self.client.get(self.listing_url, {'category': self.category.id},
+                                         HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_listing_last_modified_advances_on_delete(self):
+        other = Post.objects.create(title='Another', content='Test Content', author=self.user)
+        last_modified = self.client.get(self.listing_url)['Last-Modified']
+        cache.delete(page_cache_key(self.listing_url))
+        with mock.patch('accounts.cache.time.time_ns', return_value=time.time_ns() + 2 * 10 ** 9):
+            other.delete()
+        response = self.client.get(self.listing_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Another')
+
+    def test_page_cache_hit_honours_etag(self):
+        etag = self.client.get(self.listing_url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.listing_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class FeedTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='testuser@example.com', password='password123', first_name='Test', last_name='User')
+        self.other = User.objects.create_user(email='other@example.com', password='password123')
+        self.category = Category.objects.create(name='Test Category')
+        self.blog_post = Post.objects.create(title='Test Title', content='Test Content', author=self.user,
+                                             category=self.category)
+        Post.objects.create(title='Other Title', content='Other Content', author=self.other)
+
+    def test_site_feeds(self):
+        rss = self.client.get(reverse('feed_rss'))
+        self.assertEqual(rss['Content-Type'], 'application/rss+xml; charset=utf-8')
+        self.assertContains(rss, 'Test Title')
+        self.assertContains(rss, 'Other Title')
+        atom = self.client.get(reverse('feed_atom'))
+        self.assertEqual(atom['Content-Type'], 'application/atom+xml; charset=utf-8')
+        self.assertContains(atom, '<name>Test User</name>')
+
+    def test_category_and_author_feeds_filter(self):
+        response = self.client.get(reverse('category_feed_rss', args=[self.category.id]))
+        self.assertContains(response, 'Test Title')
+        self.assertNotContains(response, 'Other Title')
+        response = self.client.get(reverse('author_feed_atom', args=[self.other.id]))
+        self.assertContains(response, 'Other Title')
+        self.assertNotContains(response, 'Test Title')
+        self.assertEqual(self.client.get(reverse('category_feed_rss', args=[999])).status_code, 404)
+
+    def test_feed_is_cached_and_revalidated(self):
+        url = reverse('feed_rss')
+        etag = self.client.get(url)['ETag']
+        # Only the validator query: the document comes from the cache.
+        with self.assertNumQueries(1):
+            self.assertContains(self.client.get(url), 'Test Title')
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_post_save_invalidates_feed(self):
+        url = reverse('feed_rss')
+        etag = self.client.get(url)['ETag']
+        self.blog_post.title = 'Edited Title'
+        self.blog_post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Edited Title')
+
+    def test_category_rename_advances_last_modified(self):
+        url = reverse('category_feed_rss', args=[self.category.id])
+        last_modified = self.client.get(url)['Last-Modified']
+        self.category.name = 'Renamed Category'
+        with mock.patch('accounts.cache.time.time_ns', return_value=time.time_ns() + 2 * 10 ** 9):
+            self.category.save()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Renamed Category')
+
+
+class AsyncViewsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(
+            email='testuser@example.com', password='password123', first_name='Test', last_name='User')
+        self.category = Category.objects.create(name='Test Category')
+        self.posts = [Post.objects.create(title=f'Post {i}', content=f'Content {i}', author=self.user,
+                                          category=self.category) for i in range(7)]
+
+    async def test_asgi_requests_use_async_views(self):
+        response = await self.async_client.get(reverse('latest_blog_posts'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.resolver_match.func.__module__, 'accounts.async_views')
+        self.assertContains(response, 'Post 6')
+        self.assertNotContains(response, 'Post 1<')
+
+    def test_wsgi_requests_use_sync_views(self):
+        response = self.client.get(reverse('latest_blog_posts'))
+        self.assertEqual(response.resolver_match.func.__module__, 'accounts.views')
+
+    async def test_listing_pages_match_sync_view(self):
+        for params in ({}, {'page': 2}, {'category': self.category.id}):
+            async_response = await self.async_client.get(reverse('latest_blog_posts'), params)
+            await cache.aclear()
+            sync_response = await sync_to_async(self.client.get)(reverse('latest_blog_posts'), params)
+            await cache.aclear()
+            for post in self.posts:
+                self.assertEqual(post.title in async_response.content.decode(),
+                                 post.title in sync_response.content.decode(), (params, post.title))
+
+    async def test_post_detail_and_comment(self):
+        post = self.posts[0]
+        url = reverse('post_detail', args=[post.id])
+        response = await self.async_client.post(url, {'name': 'Commenter', 'email': 'c@example.com', 'body': 'Hi'})
+        self.assertEqual((response.status_code, response['Location']), (302, url))
+        self.assertEqual(await Comment.objects.filter(post=post).acount(), 1)
+        response = await self.async_client.get(url)
+        self.assertContains(response, 'Content 0')
+        response = await self.async_client.get(url, headers={'if-none-match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual((await self.async_client.get(reverse('post_detail', args=[0]))).status_code, 404)
+
+    async def test_profile(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('profile'))
+        self.assertContains(response, 'testuser@example.com')
+        self.assertContains(response, 'Post 3')
+
+
+task_calls = []
+
+
+@task(max_retries=2, retry_delay=0)
+def record_call(value, fail=False):
+    task_calls.append(value)
+    if fail:
+        raise RuntimeError('failed')
+
+
+class TaskQueueTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        task_calls.clear()
+        self.user = User.objects.create_user(
+            email='testuser@example.com', password='password123', first_name='Test', last_name='User')
+        self.client.login(email='testuser@example.com', password='password123')
+
+    @override_settings(TASKS_BACKEND='immediate')
+    def test_create_post_warms_detail_cache_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.client.post(reverse('create_post'), {'title': 'New Post', 'content': 'New Content'})
+        self.assertEqual(len(callbacks), 1)
+        post = Post.objects.get(title='New Post')
+        self.client.logout()
+        with self.assertNumQueries(1):  # Only the conditional GET validators; the block comes from the cache.
+            response = self.client.get(reverse('post_detail', args=[post.pk]))
+        self.assertContains(response, 'New Content')
+
+    @override_settings(TASKS_BACKEND='immediate')
+    def test_nothing_runs_on_rollback(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    enqueue(record_call, 1)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(task_calls, [])
+
+    @override_settings(TASKS_BACKEND='database')
+    def test_database_queue_deduplicates_pending_calls(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue(record_call, 1)
+            enqueue(record_call, 1)
+            enqueue(record_call, 2)
+        self.assertEqual(QueuedTask.objects.count(), 2)
+        self.assertEqual(QueuedTask.objects.first().dedup_key, dedup_key(record_call.task_name, [1]))
+        call_command('run_tasks', once=True, stdout=StringIO())
+        self.assertEqual(task_calls, [1, 2])
+        self.assertEqual(QueuedTask.objects.filter(status=QueuedTask.DONE).count(), 2)
+        # A finished task does not block the same call from being queued again.
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue(record_call, 1)
+        self.assertEqual(QueuedTask.objects.filter(status=QueuedTask.PENDING).count(), 1)
+
+    @override_settings(TASKS_BACKEND='database')
+    def test_database_queue_retries_then_fails(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue(record_call, 1, fail=True)
+        with self.assertLogs('accounts.tasks', 'WARNING') as logs:
+            for attempt in range(1, 4):
+                queued = run_next_queued_task()
+                self.assertEqual(queued.attempts, attempt)
+        self.assertIn('failed after 3 attempts', logs.output[-1])
+        self.assertEqual(queued.status, QueuedTask.FAILED)
+        self.assertEqual(queued.last_error, 'RuntimeError: failed')
+        self.assertIsNone(run_next_queued_task())
+        self.assertEqual(task_calls, [1, 1, 1])
+
+    def test_thread_backend_runs_task(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue(record_call, 'threaded')
+        # The task runs on a worker thread.
+        for _ in range(100):
+            if task_calls:
+                break
+            time.sleep(0.02)
+        self.assertEqual(task_calls, ['threaded'])
+
+
+@override_settings(COMMENT_WRITE_BEHIND=True, COMMENT_BUFFER_SIZE=3, COMMENT_BUFFER_FLUSH_SECONDS=0)
+class CommentBufferTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='testuser@example.com', password='password123', first_name='Test', last_name='User')
+        self.post = Post.objects.create(title='Busy Post', content='Test Content', author=self.user)
+        self.url = reverse('post_detail', args=[self.post.id])
+
+    def tearDown(self):
+        comment_buffer.flush()
+
+    def comment(self, body):
+        return self.client.post(self.url, {'name': 'Commenter', 'email': 'c@example.com', 'body': body})
+
+    def test_comment_is_pending_until_flushed(self):
+        response = self.comment('First!')
+        self.assertContains(response, 'Pending')
+        self.assertContains(response, 'First!')
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertEqual(len(comment_buffer), 1)
+
+        self.assertEqual(comment_buffer.flush(), 1)
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Comments (1)')
+        self.assertContains(response, 'First!')
+
+    def test_full_buffer_is_written_in_one_insert(self):
+        self.comment('One')
+        self.comment('Two')
+        with CaptureQueriesContext(connection) as ctx:
+            self.comment('Three')
+        self.assertEqual(len([q for q in ctx.captured_queries if q['sql'].startswith('INSERT')]), 1)
+        self.assertEqual(len(comment_buffer), 0)
+        self.assertEqual(list(Comment.objects.order_by('created_on').values_list('body', flat=True)),
+                         ['One', 'Two', 'Three'])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 3)
+
+    def test_invalid_comment_is_not_buffered(self):
+        response = self.client.post(self.url, {'name': 'Commenter', 'email': 'not-an-email', 'body': 'Hi'})
+        self.assertNotContains(response, 'Pending')
+        self.assertEqual(len(comment_buffer), 0)
+
+    def test_comments_on_deleted_post_are_dropped(self):
+        other = Post.objects.create(title='Other Post', content='Test Content', author=self.user)
+        self.comment('Kept')
+        self.client.post(reverse('post_detail', args=[other.id]),
+                         {'name': 'Commenter', 'email': 'c@example.com', 'body': 'Lost'})
+        Post.objects.filter(pk=other.pk).delete()
+        with self.assertLogs('accounts.comments', 'WARNING'):
+            self.assertEqual(comment_buffer.flush(), 1)
+        self.assertEqual(list(Comment.objects.values_list('body', flat=True)), ['Kept'])
+
+    @override_settings(TASKS_BACKEND='thread')
+    def test_atexit_flush_after_task_pool_shutdown(self):
+        buffer = CommentBuffer()
+        with mock.patch('accounts.writebehind.atexit.register') as register:
+            buffer.add(Comment(post=self.post, name='Commenter', email='c@example.com', body='Last words'))
+        atexit_hook = register.call_args.args[0]
+        pool = ThreadPoolExecutor()
+        pool.shutdown()
+        with mock.patch('accounts.taskqueue._executor', pool), self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(atexit_hook(), 1)
+        self.assertEqual(list(Comment.objects.values_list('body', flat=True)), ['Last words'])
+        # The post's cache was rebuilt inline rather than the task being lost.
+        self.assertIsNotNone(cache.get(f'post:{self.post.pk}:v{get_version("post", self.post.pk)}:detail'))
+
+
+@override_settings(VIEW_COUNTS_ENABLED=True, VIEW_COUNTS_FLUSH_SECONDS=0)
+class ViewCountTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        view_counter.flush()
+        self.user = User.objects.create_user(
+            email='testuser@example.com', password='password123', first_name='Test', last_name='User')
+        self.posts = [Post.objects.create(title=f'Post {i}', content='Test Content', author=self.user)
+                      for i in range(3)]
+
+    def view(self, post, times=1):
+        for _ in range(times):
+            self.client.get(reverse('post_detail', args=[post.id]))
+
+    def test_views_are_counted_without_writes(self):
+        self.view(self.posts[0])
+        with CaptureQueriesContext(connection) as ctx:
+            self.view(self.posts[0])  # Served from the page cache.
+        self.assertFalse([q['sql'] for q in ctx.captured_queries])
+        self.assertEqual(len(view_counter), 2)
+        self.assertFalse(PostStats.objects.exists())
+
+    def test_flush_merges_counts_into_daily_stats(self):
+        self.view(self.posts[0], 3)
+        self.assertEqual(view_counter.flush(), 3)
+        self.view(self.posts[0], 2)
+        self.view(self.posts[1])
+        # Savepoint, post check, one upsert for both rows, release, and only the day's ranking recomputed.
+        with self.assertNumQueries(5):
+            self.assertEqual(view_counter.flush(), 3)
+        stats = PostStats.objects.get(post=self.posts[0])
+        self.assertEqual((stats.day, stats.views), (timezone.now().date(), 5))
+        self.assertEqual(PostStats.objects.get(post=self.posts[1]).views, 1)
+
+    def test_popular_ranks_by_window(self):
+        today = timezone.now().date()
+        PostStats.objects.create(post=self.posts[2], day=today - timedelta(days=10), views=100)
+        self.view(self.posts[1], 2)
+        self.view(self.posts[0])
+        view_counter.flush()
+
+        response = self.client.get(reverse('popular'))
+        self.assertEqual([post.title for post in response.context['posts']], ['Post 1', 'Post 0'])
+        self.assertEqual(response.context['posts'][0].views, 2)
+        response = self.client.get(reverse('popular'), {'window': 'all'})
+        self.assertEqual([post.title for post in response.context['posts']], ['Post 2', 'Post 1', 'Post 0'])
+
+    def test_popular_is_served_from_cache(self):
+        self.view(self.posts[0])
+        view_counter.flush()
+        self.client.get(reverse('popular'))
+        with self.assertNumQueries(1):  # The posts of the cached ranking.
+            response = self.client.get(reverse('popular'), {'window': 'day'})
+        self.assertContains(response, '1 view')
+
+    def test_long_windows_refresh_on_a_slower_schedule(self):
+        self.view(self.posts[0])
+        with self.assertNumQueries(8):  # The first flush of the period recomputes all four rankings.
+            view_counter.flush()
+        self.view(self.posts[1], 2)
+        view_counter.flush()
+        self.assertEqual(popular_post_ids('day'), [(self.posts[1].pk, 2), (self.posts[0].pk, 1)])
+        self.assertEqual(popular_post_ids('all'), [(self.posts[0].pk, 1)])
+
+        cache.delete('popular:long-refresh')
+        self.view(self.posts[1])
+        view_counter.flush()
+        self.assertEqual(popular_post_ids('all'), [(self.posts[1].pk, 3), (self.posts[0].pk, 1)])
+
+    def test_views_of_deleted_posts_are_dropped(self):
+        self.view(self.posts[0])
+        self.view(self.posts[1])
+        self.posts[1].delete()
+        self.assertEqual(view_counter.flush(), 1)
+        self.assertEqual(list(PostStats.objects.values_list('post', flat=True)), [self.posts[0].pk])
+
+
+class CachedUserTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='testuser@example.com', password='password123', first_name='Test', last_name='User')
+        self.client.login(email='testuser@example.com', password='password123')
+
+    def test_session_and_user_come_from_cache(self):
+        self.client.get(reverse('profile'))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('profile'))
+        self.assertContains(response, 'Test User')
+        tables = ' '.join(q['sql'] for q in ctx.captured_queries)
+        self.assertNotIn('django_session', tables)
+        self.assertNotIn('accounts_customuser', tables)
+
+    def test_edit_profile_invalidates_cached_user(self):
+        self.client.get(reverse('profile'))
+        self.client.post(reverse('edit_profile'), {'email': 'testuser@example.com', 'first_name': 'Renamed',
+                                                   'last_name': 'User', 'date_of_birth': '1990-01-01'})
+        self.assertContains(self.client.get(reverse('profile')), 'Renamed User')
+
+    def test_password_change_logs_out_other_sessions(self):
+        self.client.get(reverse('profile'))
+        self.user.set_password('new-password456')
+        self.user.save()
+        response = self.client.get(reverse('create_post'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('login'), response['Location'])
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_signed_cookie_sessions(self):
+        client = Client()
+        client.login(email='testuser@example.com', password='password123')
+        client.get(reverse('profile'))
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse('profile'))
+        self.assertContains(response, 'Test User')
+        self.assertNotIn('django_session', ' '.join(q['sql'] for q in ctx.captured_queries))
+
+
+@override_settings(LOGIN_THROTTLE_IP_RATE=(4, 60), LOGIN_THROTTLE_EMAIL_RATE=(2, 60))
+class LoginThrottleTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        reset_login_throttle_stats()
+        self.user = User.objects.create_user(email='testuser@example.com', password='password123')
+
+    def attempt(self, email='testuser@example.com', password='wrong', ip='203.0.113.1'):
+        return self.client.post(reverse('login'), {'username': email, 'password': password}, REMOTE_ADDR=ip)
+
+    def test_email_limit_rejects_before_authenticate(self):
+        self.attempt(ip='203.0.113.1')
+        self.attempt(ip='203.0.113.2')
+        with mock.patch('django.contrib.auth.forms.authenticate') as authenticate:
+            response = self.attempt(ip='203.0.113.3')
+        authenticate.assert_not_called()
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertContains(response, 'Too many login attempts', status_code=429)
+        self.assertEqual(login_throttle_stats(), {'allowed': 2, 'rejected_ip': 0, 'rejected_email': 1})
+
+    def test_ip_limit_spans_emails(self):
+        for i in range(4):
+            self.assertEqual(self.attempt(email=f'user{i}@example.com').status_code, 200)
+        self.assertEqual(self.attempt(email='other@example.com').status_code, 429)
+        self.assertEqual(self.attempt(email='other@example.com', ip='203.0.113.9').status_code, 200)
+        self.assertEqual(login_throttle_stats()['rejected_ip'], 1)
+
+    def test_successful_logins_do_not_use_up_the_email_limit(self):
+        for i in range(3):
+            self.assertEqual(self.attempt(password='password123', ip=f'203.0.113.{i}').status_code, 302)
+            self.client.logout()
+
+    @override_settings(LOGIN_THROTTLE_ENABLED=False)
+    def test_throttling_can_be_disabled(self):
+        for _ in range(3):
+            self.assertEqual(self.attempt().status_code, 200)
+        self.assertEqual(login_throttle_stats()['allowed'], 0)
+
+
+class TemplateWarmupTest(TestCase):
+
+    def test_warm_templates_fills_cached_loader(self):
+        loader = engines['django'].engine.template_loaders[0]
+        loader.reset()
+        timings = warm_templates()
+        self.assertIn('base.html', timings)
+        self.assertIn('accounts/post_detail.html', timings)
+        with mock.patch('django.template.loaders.filesystem.Loader.get_contents') as get_contents:
+            get_template('accounts/post_detail.html')
+        get_contents.assert_not_called()
+
+    def test_profile_templates_reports_tags_and_filters(self):
+        call_command('seed_blog', users=2, categories=2, posts=5, comments=10, stdout=StringIO())
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'templates.json')
+            call_command('profile_templates', repeat=2, host='testserver', output=output, stdout=StringIO())
+            with open(output) as f:
+                results = json.load(f)
+        listing = results['pages']['latest_blog_posts']
+        self.assertIn('accounts/latest_blog_posts.html', listing['templates'])
+        self.assertIn('{{ |date }}', listing['tags'])
+        self.assertIn('{% for %}', listing['tags'])
+
+
+class StaticBuildTest(TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        source = os.path.join(tmp.name, 'source')
+        self.root = os.path.join(tmp.name, 'root')
+        os.makedirs(os.path.join(source, 'css'))
+        os.makedirs(os.path.join(source, 'img'))
+        with open(os.path.join(source, 'css', 'site.css'), 'w') as f:
+            f.write('.logo { background: url("../img/logo.png"); }\n' + '.card { margin: 0 auto; }\n' * 50
+                    + '/*# sourceMappingURL=site.css.map */\n')
+        with open(os.path.join(source, 'img', 'logo.png'), 'wb') as f:
+            f.write(os.urandom(512))
+        settings_override = override_settings(
+            STATICFILES_DIRS=[source], STATIC_ROOT=self.root, STATIC_SERVE_PRECOMPRESSED=True, STATIC_MAX_AGE=60,
+            STORAGES={'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                      'staticfiles': {'BACKEND': 'accounts.storage.CompressedManifestStaticFilesStorage'}})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        with self.assertLogs('accounts.static', 'WARNING'):
+            call_command('build_static', stdout=StringIO())
+        with open(os.path.join(self.root, 'staticfiles.json')) as f:
+            self.paths = json.load(f)['paths']
+
+    def test_build_writes_hashed_and_compressed_files(self):
+        css = self.paths['css/site.css']
+        self.assertRegex(css, r'^css/site\.[0-9a-f]{12}\.css$')
+        with gzip.open(os.path.join(self.root, css + '.gz')) as f:
+            content = f.read().decode()
+        self.assertIn(self.paths['img/logo.png'].split('/')[1], content)
+        # The missing source map is left alone rather than failing the build.
+        self.assertIn('sourceMappingURL=site.css.map', content)
+        self.assertFalse(os.path.exists(os.path.join(self.root, self.paths['img/logo.png'] + '.gz')))
+
+    def test_static_tag_resolves_through_manifest(self):
+        rendered = Template("{% load static %}{% static 'css/site.css' %}").render(Context())
+        self.assertEqual(rendered, '/static/' + self.paths['css/site.css'])
+
+    def test_serves_precompressed_hashed_files_as_immutable(self):
+        url = '/static/' + self.paths['css/site.css']
+        response = Client().get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertIn(b'.card', gzip.decompress(b''.join(response.streaming_content)))
+
+        for accept_encoding in ('', 'gzip;q=0', 'gzip;q=0.0', 'br;q=0, gzip; q=0.000', 'identity', '*;q=0'):
+            response = Client().get(url, HTTP_ACCEPT_ENCODING=accept_encoding)
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertIn(b'.card', b''.join(response.streaming_content))
+
+        for accept_encoding in ('GZIP;q=0.5', 'br;q=0, gzip;q=0.1', 'br;q=0, *'):
+            response = Client().get(url, HTTP_ACCEPT_ENCODING=accept_encoding)
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_unhashed_files_are_revalidated(self):
+        response = Client().get('/static/css/site.css')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        response = Client().get('/static/css/site.css', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+
+class SharedCacheCheckTest(TestCase):
+
+    def test_locmem_cache_is_flagged_for_deployment(self):
+        self.assertEqual([warning.id for warning in check_shared_cache(None)], ['accounts.W001'])
+
+    def test_shared_cache_passes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            caches = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tmp}}
+            with override_settings(CACHES=caches):
+                self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,102 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger('accounts.throttle')
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def login_throttle_stats():
+    """Return this process's counts of login attempts let through and rejected (per bucket that rejected them)."""
+    with _stats_lock:
+        return {outcome: _stats[outcome] for outcome in ('allowed', 'rejected_ip', 'rejected_email')}
+
+
+def reset_login_throttle_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _bucket(scope, ident, capacity, period):
+    """Return the cache key and current (refilled) token count of a bucket."""
+    key = f'throttle:{scope}:{hashlib.md5(ident.encode()).hexdigest()}'
+    now = time.time()
+    tokens, updated_at = cache.get(key, (capacity, now))
+    return key, min(capacity, tokens + (now - updated_at) * capacity / period)
+
+
+def take_token(scope, ident, capacity, period):
+    """
+        Take one token from the token bucket of ident (e.g. an IP address) in scope.
+
+        A bucket holds up to capacity tokens and refills at capacity tokens per period seconds; its state is
+        (tokens, last update time) in the cache, under a key expiring once the bucket would be full again. The
+        read-modify-write is not atomic, so concurrent attempts may occasionally be let through on the same
+        token, which is acceptable for shedding load.
+
+        Returns:
+        - 0 if a token was taken, else the seconds until the next token is available
+        """
+    key, tokens = _bucket(scope, ident, capacity, period)
+    if tokens >= 1:
+        cache.set(key, (tokens - 1, time.time()), period)
+        return 0
+    cache.set(key, (tokens, time.time()), period)
+    return (1 - tokens) * period / capacity
+
+
+def give_token(scope, ident, capacity, period):
+    """Put a token taken with take_token() back into its bucket."""
+    key, tokens = _bucket(scope, ident, capacity, period)
+    cache.set(key, (min(capacity, tokens + 1), time.time()), period)
+
+
+def throttle_login(request, email):
+    """
+        Apply the login rate limits to a login attempt, before its password is checked.
+
+        The attempt takes a token from the bucket of the client's IP address (settings.LOGIN_THROTTLE_IP_RATE) and
+        from that of the email it tries to log in as (settings.LOGIN_THROTTLE_EMAIL_RATE), so that neither one
+        address trying many accounts nor many addresses trying one account can make the server hash passwords
+        faster than the limits allow.
+
+        Returns:
+        - None if the attempt may go ahead, else the seconds after which it may be retried
+        """
+    if not settings.LOGIN_THROTTLE_ENABLED:
+        return None
+    buckets = (
+        ('ip', request.META.get('REMOTE_ADDR', ''), settings.LOGIN_THROTTLE_IP_RATE),
+        ('email', (email or '').strip().lower(), settings.LOGIN_THROTTLE_EMAIL_RATE),
+    )
+    for scope, ident, (capacity, period) in buckets:
+        if not ident:
+            continue
+        retry_after = take_token(f'login-{scope}', ident, capacity, period)
+        if retry_after:
+            _count(f'rejected_{scope}')
+            logger.info('Rejected a login attempt over the %s limit; retry in %.1fs', scope, retry_after)
+            return retry_after
+    _count('allowed')
+    return None
+
+
+def login_succeeded(request, email):
+    """
+        Give back the email bucket's token of a successful login, so that only failed attempts count against an
+        account and its owner logging in repeatedly is never locked out.
+        """
+    if settings.LOGIN_THROTTLE_ENABLED and email:
+        give_token('login-email', email.strip().lower(), *settings.LOGIN_THROTTLE_EMAIL_RATE)
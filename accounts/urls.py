@@ -1,19 +1,30 @@
-from django.contrib.auth import views as auth_views
 from django.urls import path
 from django.conf import settings
 from .views import *
+from .feeds import author_atom, author_rss, category_atom, category_rss, latest_posts_atom, latest_posts_rss
 from django.conf.urls.static import static
 
 urlpatterns = [
     path('', latest_blog_posts, name='latest_blog_posts'),
     path('register/', registerPage, name='register'),
-    path('login/', auth_views.LoginView.as_view(template_name='accounts/login.html'), name='login'),
+    path('login/', ThrottledLoginView.as_view(template_name='accounts/login.html'), name='login'),
     path('profile/', profile, name='profile'),
     path('profile/edit/', edit_profile, name='edit_profile'),
     path('logout/', logoutUser, name='logout'),
     path('post/create/', create_post, name='create_post'),
     path('post/edit/<int:pk>/', edit_post, name='edit_post'),
     path('post/<int:pk>/', post_detail, name='post_detail'),
+    path('post/<int:pk>/comments/', post_comments, name='post_comments'),
+    path('search/', search, name='search'),
+    path('popular/', popular, name='popular'),
+    path('feeds/posts.rss', latest_posts_rss, name='feed_rss'),
+    path('feeds/posts.atom', latest_posts_atom, name='feed_atom'),
+    path('feeds/category/<int:pk>.rss', category_rss, name='category_feed_rss'),
+    path('feeds/category/<int:pk>.atom', category_atom, name='category_feed_atom'),
+    path('feeds/author/<int:pk>.rss', author_rss, name='author_feed_rss'),
+    path('feeds/author/<int:pk>.atom', author_atom, name='author_feed_atom'),
+    path('export/posts/', export, {'kind': 'posts'}, name='export_posts'),
+    path('export/comments/', export, {'kind': 'comments'}, name='export_comments'),
 
 ]
 if settings.DEBUG:
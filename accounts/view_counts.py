@@ -0,0 +1,136 @@
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Post, PostStats
+from .routers import primary_reads
+from .writebehind import WriteBehindBuffer
+
+logger = logging.getLogger('accounts.view_counts')
+
+# Days of views each /popular/ window adds up, today included; None means all time.
+POPULAR_WINDOWS = {'day': 1, 'week': 7, 'month': 30, 'all': None}
+
+# Windows recomputed after every flush. The longer ones add up far more PostStats rows (all of them, for 'all'), so
+# they are recomputed at most every POPULAR_LONG_WINDOWS_REFRESH_SECONDS, by whichever worker flushes first.
+FAST_WINDOWS = ('day',)
+
+
+class ViewCounter(WriteBehindBuffer):
+    """
+        Post views counted in process memory (settings.VIEW_COUNTS_ENABLED), so that a post_detail hit costs a
+        dict increment rather than an UPDATE.
+
+        A background thread merges the counts into PostStats every VIEW_COUNTS_FLUSH_SECONDS, with one upsert per
+        post and day in a single transaction, and then recomputes the cached /popular/ ranking of the day (and
+        now and then those of the longer windows). Each worker process counts and flushes its own views.
+        """
+    interval_setting = 'VIEW_COUNTS_FLUSH_SECONDS'
+
+    def __init__(self):
+        super().__init__()
+        self._counts = Counter()
+
+    def __len__(self):
+        """The number of views counted and not flushed yet."""
+        with self._lock:
+            return sum(self._counts.values())
+
+    def count(self, post_id):
+        day = timezone.now().date()
+        with self._lock:
+            self._counts[post_id, day] += 1
+        self.start()
+
+    def flush(self):
+        """
+            Add the views counted since the last flush to PostStats and refresh the /popular/ rankings due. Views of
+            posts deleted in the meantime are dropped; if the write fails the counts are kept for the next flush.
+
+            Returns:
+            - the number of views written
+            """
+        with self._flush_lock:
+            with self._lock:
+                counts, self._counts = self._counts, Counter()
+            if not counts:
+                return 0
+            try:
+                with transaction.atomic():
+                    post_ids = set(Post.objects.filter(pk__in={post_id for post_id, day in counts})
+                                   .values_list('pk', flat=True))
+                    rows = [(post_id, day, views) for (post_id, day), views in sorted(counts.items())
+                            if post_id in post_ids]
+                    _add_views(rows)
+            except Exception:
+                logger.exception('Could not write %d post views; retrying on the next flush', sum(counts.values()))
+                with self._lock:
+                    self._counts.update(counts)
+                return 0
+            windows = FAST_WINDOWS
+            # The cache is shared, so one worker per period claims the long windows.
+            if cache.add('popular:long-refresh', 1, settings.POPULAR_LONG_WINDOWS_REFRESH_SECONDS):
+                windows = POPULAR_WINDOWS
+            refresh_popular(windows)
+            return sum(views for post_id, day, views in rows)
+
+
+def _add_views(rows):
+    """Upsert (post_id, day, views) rows into PostStats, adding to the views already stored."""
+    table = connection.ops.quote_name(PostStats._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {table} (post_id, day, views) VALUES (%s, %s, %s) '
+            f'ON CONFLICT (post_id, day) DO UPDATE SET views = {table}.views + excluded.views',
+            [(post_id, connection.ops.adapt_datefield_value(day), views) for post_id, day, views in rows])
+
+
+def _popular_key(window):
+    return f'popular:{window}'
+
+
+def _compute_popular(window):
+    stats = PostStats.objects.all()
+    days = POPULAR_WINDOWS[window]
+    if days is not None:
+        stats = stats.filter(day__gt=timezone.now().date() - timedelta(days=days))
+    with primary_reads():
+        return list(stats.values('post').annotate(total=Sum('views')).order_by('-total', 'post')
+                    .values_list('post', 'total')[:settings.POPULAR_POSTS])
+
+
+def _popular_timeout(window):
+    if window in FAST_WINDOWS:
+        return settings.POPULAR_CACHE_TIMEOUT
+    # Long enough to last until the next scheduled refresh.
+    return settings.POPULAR_LONG_WINDOWS_REFRESH_SECONDS + settings.POPULAR_CACHE_TIMEOUT
+
+
+def refresh_popular(windows=POPULAR_WINDOWS):
+    """Recompute and cache the top POPULAR_POSTS (post_id, views) of the given windows, by default all of them."""
+    for window in windows:
+        cache.set(_popular_key(window), _compute_popular(window), _popular_timeout(window))
+
+
+def popular_post_ids(window):
+    """
+        Return the cached [(post_id, views), ...] ranking of a window, most viewed first.
+
+        The day's ranking is recomputed after every flush of the view counter and the others every
+        POPULAR_LONG_WINDOWS_REFRESH_SECONDS; if the window's entry has expired or was evicted it is recomputed
+        here, with one aggregate query.
+        """
+    ranking = cache.get(_popular_key(window))
+    if ranking is None:
+        ranking = _compute_popular(window)
+        cache.set(_popular_key(window), ranking, _popular_timeout(window))
+    return ranking
+
+
+view_counter = ViewCounter()
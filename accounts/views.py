@@ -1,10 +1,42 @@
+import math
+
+from django.conf import settings
 from django.core.paginator import Paginator
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import render_to_string
 from .forms import UserAdminCreationForm, CustomUserChangeForm, PostForm, CommentForm
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth import views as auth_views
 from django.contrib import messages
-from .models import Post, Category
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
+from django.views.decorators.http import condition
+from .cache import cached_post_detail, category_choices
+from .comment_buffer import comment_buffer
+from .conditional import listing_etag, listing_last_modified, post_detail_etag, post_detail_last_modified
+from .export import EXPORTS, async_chunks, json_array_chunks, ndjson_lines, parse_since
+from .models import Comment, Post
+from .pagination import KeysetPage, keyset_paginate, keyset_paginate_forward
+from .routers import read_from_replica
+from .search import search_posts
+from .taskqueue import enqueue
+from .throttle import login_succeeded, throttle_login
+from .tasks import refresh_post_caches
+from .view_counts import POPULAR_WINDOWS, popular_post_ids
+
+POSTS_PER_PAGE = 5  # Show 5 blog posts per page
+SEARCH_RESULTS_PER_PAGE = 10
+# Deepest search results page served; relevance-ranked results that far down are of no use, and the OFFSET must stay
+# within SQLite's 64-bit integers.
+SEARCH_MAX_PAGES = 100
+# Columns a rendered post card needs, including its author's name through the join.
+POST_CARD_FIELDS = ('title', 'excerpt', 'created_at', 'author__first_name', 'author__last_name')
+# Columns the post detail page needs: the full body instead of the excerpt, and the stored comment count.
+POST_DETAIL_FIELDS = ('title', 'content', 'created_at', 'comment_count', 'author__first_name', 'author__last_name')
+COMMENTS_PER_PAGE = 20
+COMMENT_FIELDS = ('post', 'name', 'body', 'created_on')
 
 
 def registerPage(request):
@@ -62,6 +94,9 @@ def loginPage(request):
       2. If authentication is successful, the user is logged in and redirected to their profile page.
       3. If authentication fails, an information message is displayed, and the login form is re-rendered.
 
+      Attempts over the login rate limits (see accounts.throttle) are answered with 429 Too Many Requests before
+      the password is checked.
+
       Returns:
       - HttpResponse object rendering the 'login.html' template. For POST requests, this depends on the
         outcome of the authentication process. For GET requests, it simply renders the form.
@@ -69,8 +104,12 @@ def loginPage(request):
     if request.method == 'POST':
         username = request.POST.get('username')
         password = request.POST.get('password')
+        retry_after = throttle_login(request, username)
+        if retry_after:
+            return login_throttled(request, retry_after, lambda: render(request, 'login.html', {}, status=429))
         user = authenticate(request, email=username, password=password)
         if user is not None:
+            login_succeeded(request, username)
             login(request, user)
             return redirect('profile')
         else:
@@ -80,6 +119,36 @@ def loginPage(request):
     return render(request, 'login.html', context)
 
 
+def login_throttled(request, retry_after, render_form):
+    """
+        Answer a throttled login attempt: the login form, rendered by render_form() with status 429 and a message
+        saying how long to wait, and a Retry-After header.
+        """
+    retry_after = math.ceil(retry_after)
+    messages.error(request, f'Too many login attempts. Please try again in {retry_after} seconds.')
+    response = render_form()
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+class ThrottledLoginView(auth_views.LoginView):
+    """
+        Django's LoginView, with attempts over the login rate limits (see accounts.throttle) answered with 429 Too
+        Many Requests before the form, and with it the password hash, is checked.
+        """
+
+    def post(self, request, *args, **kwargs):
+        retry_after = throttle_login(request, request.POST.get('username'))
+        if retry_after:
+            return login_throttled(request, retry_after,
+                                   lambda: self.render_to_response(self.get_context_data(), status=429))
+        return super().post(request, *args, **kwargs)
+
+    def form_valid(self, form):
+        login_succeeded(self.request, self.request.POST.get('username'))
+        return super().form_valid(form)
+
+
 @login_required(login_url='login')
 def logoutUser(request):
     logout(request)
@@ -100,7 +169,7 @@ def profile(request):
         - HttpResponse object rendering the 'accounts/profile.html' template with the user and their posts as context.
         """
     user = request.user
-    user_posts = Post.objects.filter(author=user).order_by('-created_at')
+    user_posts = Post.objects.filter(author=user).only('title', 'excerpt', 'created_at').order_by('-created_at')
     return render(request, 'accounts/profile.html', {'user': user, 'user_posts': user_posts})
 
 
@@ -138,12 +207,15 @@ def edit_profile(request):
     return render(request, 'accounts/edit_profile.html', {'form': form})
 
 
+@read_from_replica
+@condition(etag_func=listing_etag, last_modified_func=listing_last_modified)
 def latest_blog_posts(request):
     """
         Display a paginated list of the latest blog posts.
 
         This view filters blog posts by category if a category ID is provided in the request's GET parameters.
-        It paginates the posts, showing a specified number of posts per page.
+        It paginates the posts with keyset (cursor) pagination on (created_at, id), so no page costs a COUNT(*)
+        or an OFFSET scan no matter how deep into the archive it is.
 
         Parameters:
         - request: HttpRequest object, containing metadata about the request.
@@ -152,27 +224,43 @@ def latest_blog_posts(request):
         1. Checks if a 'category' ID is provided in the GET parameters of the request.
            - If yes, filters the posts by the specified category.
            - If no, selects all posts.
-        2. Orders the selected posts by their creation date in descending order.
-        3. Paginates the posts, showing a fixed number of posts per page.
-        4. Fetches all categories for category filter options in the template.
+        2. If a legacy 'page' number is provided, that page is served with the numbered Paginator so old links
+           keep working; the next/previous links it renders are cursors.
+        3. Otherwise the 'after' or 'before' cursor (if any) selects the page, newest posts first.
+        4. Fetches all categories, with their post counts, for the category filter options in the template. The
+           list is cached in process memory until a category or post changes.
+
+        The view answers If-None-Match/If-Modified-Since with 304 Not Modified before doing any of this, using
+        validators taken from the newest post's updated_at (see accounts.conditional).
+
+        Reads go to the read replica, if one is configured, except for a few seconds after the visitor's own
+        writes (see accounts.routers).
 
         Returns:
-        - HttpResponse object rendering the 'accounts/latest_blog_posts.html' template with the paginated posts,
+        - HttpResponse object rendering the 'accounts/latest_blog_posts.html' template with the page of posts,
           categories, and the selected category (if any) as context.
         """
     category_id = request.GET.get('category')
+    posts_list = Post.objects.select_related('author').only(*POST_CARD_FIELDS)
     if category_id:
-        posts_list = Post.objects.filter(category_id=category_id).order_by('-created_at')
-    else:
-        posts_list = Post.objects.order_by('-created_at')
+        posts_list = posts_list.filter(category_id=category_id)
 
-    paginator = Paginator(posts_list, 5)  # Show 5 blog posts per page
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    categories = Category.objects.all()
-
-    return render(request, 'accounts/latest_blog_posts.html',
-                  {'page_obj': page_obj, 'categories': categories, 'selected_category': category_id})
+    if page_number:
+        paginator = Paginator(posts_list.order_by('-created_at', '-id'), POSTS_PER_PAGE)
+        page = paginator.get_page(page_number)
+        page_obj = KeysetPage(list(page.object_list), page.has_next(), page.has_previous())
+    else:
+        page_obj = keyset_paginate(posts_list, POSTS_PER_PAGE,
+                                   after=request.GET.get('after'), before=request.GET.get('before'))
+    categories = category_choices()
+
+    return render(request, 'accounts/latest_blog_posts.html', {
+        'page_obj': page_obj,
+        'categories': categories,
+        'selected_category': category_id,
+        'selected_category_id': int(category_id) if category_id and category_id.isdigit() else None,
+    })
 
 
 @login_required
@@ -191,7 +279,8 @@ def create_post(request):
         1. If the request method is POST, the form is instantiated with the POST data.
         2. If the form is valid, a new post instance is created but not saved to the database (commit=False).
            The current user is set as the author of the post, and then the post is saved.
-        3. After saving the post, the user is redirected to their profile page.
+        3. After saving the post, rebuilding its caches is queued as a background task that starts once the
+           transaction commits, and the user is redirected to their profile page.
         4. If the request method is not POST (e.g., GET), an empty form is displayed to the user.
 
         Returns:
@@ -204,6 +293,7 @@ def create_post(request):
             new_post = form.save(commit=False)
             new_post.author = request.user
             new_post.save()
+            enqueue(refresh_post_caches, new_post.pk)
             return redirect('profile')
     else:
         form = PostForm()
@@ -228,7 +318,8 @@ def edit_post(request, pk):
            does not exist or the current user is not the author, a 404 error is raised.
         2. If the request method is POST, the form is instantiated with the POST data and the post instance. This allows
            for the post's information to be updated upon form submission.
-        3. If the form is valid, the updated post information is saved, and the user is redirected to their profile page.
+        3. If the form is valid, the updated post information is saved, rebuilding the post's caches is queued as a
+           background task, and the user is redirected to their profile page.
         4. If the request method is not POST (e.g., GET), an instance of the form pre-filled with the post's current data
            is created and displayed.
 
@@ -241,49 +332,234 @@ def edit_post(request, pk):
         form = PostForm(request.POST, instance=post)
         if form.is_valid():
             form.save()
+            enqueue(refresh_post_caches, post.pk)
             return redirect('profile')
     else:
         form = PostForm(instance=post)
     return render(request, 'accounts/edit_post.html', {'form': form, 'post': post})
 
 
+def post_comments_page(pk, after=None):
+    """
+        Return one KeysetPage of a post's active comments, oldest first, starting after the 'after' cursor.
+        """
+    comments = Comment.objects.filter(post_id=pk, active=True).only(*COMMENT_FIELDS)
+    return keyset_paginate_forward(comments, COMMENTS_PER_PAGE, 'created_on', after=after)
+
+
+def render_post_detail_block(pk):
+    """
+        Render the cacheable part of a post_detail page: the post itself and the first page of its active comments.
+
+        Raises Http404 if the post does not exist.
+        """
+    post = get_object_or_404(Post.objects.select_related('author').only(*POST_DETAIL_FIELDS), pk=pk)
+    comments = post_comments_page(pk)
+    html = render_to_string('accounts/post_detail_content.html', {'post': post, 'comments': comments})
+    return {'title': post.title, 'html': html, 'author_id': post.author_id}
+
+
+@read_from_replica
+@condition(etag_func=post_detail_etag, last_modified_func=post_detail_last_modified)
 def post_detail(request, pk):
     """
         Display the details of a specific blog post.
 
-        This view fetches the post with the given primary key (pk) from the database and displays its details.
-        It also allows users to add comments to the post.
+        This view displays the post with the given primary key (pk) and its comments, and allows users to add
+        comments to the post. The rendered post and comment block is served from a read-through cache that is
+        invalidated whenever the post, one of its comments or its author changes, so repeated GETs of a hot post
+        run no queries at all. Only the first COMMENTS_PER_PAGE comments are rendered inline; the rest are loaded
+        on demand from the post_comments fragment.
 
         Parameters:
         - request: HttpRequest object
         - pk: Primary key of the post to be displayed
 
         Workflow:
-        1. The post is fetched from the database using its primary key. If the post does not exist, a 404 error is raised.
-        2. Comments associated with the post are fetched and displayed.
-        3. If the request method is POST, a new comment is created and saved to the database.
-        4. The post details, comments, new comment instance, and comment form are passed to the template for rendering.
+        1. If the request method is POST, the post is checked to exist (a 404 error is raised otherwise) and a new
+           comment is created and saved to the database, which invalidates the cached block. Re-rendering the block
+           is queued as a background task, and the visitor is redirected to the post with a success message rather
+           than the block being rendered in the request. With settings.COMMENT_WRITE_BEHIND the validated comment is
+           handed to the write-behind buffer instead (see accounts.comment_buffer) and shown to its author as
+           pending.
+        2. The post and comment block is taken from the cache, or rendered from the database and cached on a miss.
+           If the post does not exist, a 404 error is raised.
+        3. The block, new comment instance, and comment form are passed to the template for rendering.
+
+        GET requests whose If-None-Match/If-Modified-Since validators still match the post's updated_at and latest
+        comment are answered with 304 Not Modified before any of this (see accounts.conditional). Reads go to the
+        read replica, if one is configured, except for a few seconds after the visitor's own writes (see
+        accounts.routers); the comment itself is always written to the primary database.
 
         Returns:
-        - HttpResponse object rendering the 'accounts/post_detail.html' template with the post, comments, new comment,
-          and comment form as context.
+        - HttpResponse object rendering the 'accounts/post_detail.html' template with the post block, new comment,
+          and comment form as context, or a redirect to the post once a comment has been saved.
         """
-    post = get_object_or_404(Post, pk=pk)
-    comments = post.comments.filter(active=True)
     new_comment = None
 
     if request.method == 'POST':
+        post = get_object_or_404(Post.objects.only('pk'), pk=pk)
         comment_form = CommentForm(data=request.POST)
         if comment_form.is_valid():
             new_comment = comment_form.save(commit=False)
             new_comment.post = post
-            new_comment.save()
+            if settings.COMMENT_WRITE_BEHIND:
+                comment_buffer.add(new_comment)
+            else:
+                new_comment.save()
+                enqueue(refresh_post_caches, post.pk)
+                messages.success(request, 'Your comment has been added!')
+                return redirect('post_detail', pk=pk)
     else:
         comment_form = CommentForm()
 
+    post_block = cached_post_detail(pk, lambda: render_post_detail_block(pk))
+
     return render(request, 'accounts/post_detail.html', {
-        'post': post,
-        'comments': comments,
+        'post_block': post_block,
         'new_comment': new_comment,
         'comment_form': comment_form
     })
+
+
+@read_from_replica
+def post_comments(request, pk):
+    """
+        Return one further page of a post's comments as an HTML fragment, for the "Load more comments" link.
+
+        Parameters:
+        - request: HttpRequest object, with the 'after' cursor from the previous page's link in the GET parameters.
+        - pk: Primary key of the post
+
+        The page is read with a keyset query on (created_on, id) that seeks the comment index, so a page deep into a
+        long thread costs the same as the first, and neither the post nor the other comments are loaded. Only an
+        empty page checks that the post exists, and raises Http404 if it does not.
+
+        Returns:
+        - HttpResponse object rendering the 'accounts/comment_list.html' fragment.
+        """
+    comments = post_comments_page(pk, after=request.GET.get('after'))
+    if not comments and not Post.objects.filter(pk=pk).exists():
+        raise Http404('No Post matches the given query.')
+    return render(request, 'accounts/comment_list.html', {'comments': comments, 'post_id': pk})
+
+
+@read_from_replica
+def popular(request):
+    """
+        List the most viewed posts of a time window.
+
+        Parameters:
+        - request: HttpRequest object, with the window ('day', 'week', 'month' or 'all') in the 'window' GET
+          parameter; anything else shows the week.
+
+        Workflow:
+        1. The (post id, views) ranking of the window is taken from the cache, where it is recomputed from
+           PostStats each time the view counter flushes (see accounts.view_counts).
+        2. The posts of the ranking are loaded in one query and listed in ranking order; posts deleted since the
+           ranking was computed are left out.
+
+        Returns:
+        - HttpResponse object rendering the 'accounts/popular.html' template with the window, the available
+          windows and the posts (each annotated with its views) as context.
+        """
+    window = request.GET.get('window')
+    if window not in POPULAR_WINDOWS:
+        window = 'week'
+    ranking = popular_post_ids(window)
+    posts = Post.objects.select_related('author').only(*POST_CARD_FIELDS).in_bulk([pk for pk, views in ranking])
+    popular_posts = []
+    for pk, views in ranking:
+        if pk in posts:
+            posts[pk].views = views
+            popular_posts.append(posts[pk])
+
+    return render(request, 'accounts/popular.html', {
+        'window': window,
+        'windows': list(POPULAR_WINDOWS),
+        'posts': popular_posts,
+    })
+
+
+def search(request):
+    """
+        Full-text search over blog post titles and content.
+
+        The search runs against the SQLite FTS5 index maintained by triggers on the posts table, so its cost
+        depends on the number of matches rather than on the size of the archive.
+
+        Parameters:
+        - request: HttpRequest object, with the search text in the 'q' GET parameter and an optional 'page' number.
+
+        Workflow:
+        1. Reads the search text and page number from the GET parameters; pages beyond SEARCH_MAX_PAGES raise a
+           404 error.
+        2. Fetches one page of results, best matches first, plus one extra row to know whether a next page exists.
+        3. Each result carries the post title and a snippet of its content with the matched words highlighted.
+
+        Returns:
+        - HttpResponse object rendering the 'accounts/search.html' template with the query, the results and
+          the previous/next page numbers (if any) as context.
+        """
+    query = request.GET.get('q', '').strip()
+    try:
+        page_number = max(int(request.GET.get('page', 1)), 1)
+    except (ValueError, OverflowError):
+        page_number = 1
+    if page_number > SEARCH_MAX_PAGES:
+        raise Http404('No such page of search results.')
+
+    results = []
+    if query:
+        results = search_posts(query, limit=SEARCH_RESULTS_PER_PAGE + 1,
+                               offset=(page_number - 1) * SEARCH_RESULTS_PER_PAGE)
+    has_next = len(results) > SEARCH_RESULTS_PER_PAGE and page_number < SEARCH_MAX_PAGES
+
+    return render(request, 'accounts/search.html', {
+        'query': query,
+        'results': results[:SEARCH_RESULTS_PER_PAGE],
+        'previous_page': page_number - 1 if page_number > 1 else None,
+        'next_page': page_number + 1 if has_next else None,
+    })
+
+
+@staff_member_required
+def export(request, kind):
+    """
+        Stream every post or comment for offline analysis.
+
+        This view is read-only and restricted to staff, since comments include the commenters' email addresses.
+        Rows are read from the database in chunks and written to the response as they are encoded, so memory use
+        stays flat however large the tables are.
+
+        Parameters:
+        - request: HttpRequest object, with optional 'since' (an ISO 8601 datetime) and 'format' ('ndjson', the
+          default, or 'json') GET parameters.
+        - kind: 'posts' or 'comments'
+
+        Workflow:
+        1. Parses 'since', if given, and answers 400 Bad Request if it is not a valid datetime.
+        2. Selects posts updated (or comments created) at or after 'since', oldest first, so that the largest
+           timestamp received can be passed as 'since' on the next, incremental pull.
+        3. Streams them as newline-delimited JSON, or as one JSON array if 'format=json' is given. Under ASGI the
+           rows are streamed from an async generator (accounts.export.async_chunks), which Django sends as it goes
+           rather than reading to the end first.
+
+        Returns:
+        - StreamingHttpResponse object with the encoded rows.
+        """
+    since = request.GET.get('since')
+    if since:
+        try:
+            since = parse_since(since)
+        except ValueError:
+            return HttpResponseBadRequest('"since" must be an ISO 8601 datetime.')
+
+    rows = EXPORTS[kind](since=since)
+    if request.GET.get('format') == 'json':
+        chunks, content_type = json_array_chunks(rows), 'application/json'
+    else:
+        chunks, content_type = ndjson_lines(rows), 'application/x-ndjson'
+    if isinstance(request, ASGIRequest):
+        chunks = async_chunks(chunks)
+    return StreamingHttpResponse(chunks, content_type=content_type)
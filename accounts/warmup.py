@@ -0,0 +1,40 @@
+import logging
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.template import TemplateSyntaxError
+from django.template.loader import get_template
+
+logger = logging.getLogger('accounts.warmup')
+
+
+def template_names():
+    """
+        Names of the templates of the accounts app (accounts/templates), e.g. 'base.html' and 'accounts/profile.html'.
+        """
+    root = Path(apps.get_app_config('accounts').path) / 'templates'
+    return sorted(path.relative_to(root).as_posix() for path in root.rglob('*.html'))
+
+
+def warm_templates():
+    """
+        Load and compile every template of the accounts app into the cached template loader, so that the first
+        request to each page in a new worker process doesn't pay for reading and parsing its templates.
+
+        Templates that fail to compile are logged and skipped; they fail the same way when rendered.
+
+        Returns:
+        - {template name: milliseconds it took to load}
+        """
+    timings = {}
+    for name in template_names():
+        start = time.perf_counter()
+        try:
+            get_template(name)
+        except TemplateSyntaxError as exc:
+            logger.warning('Could not compile template %s: %s', name, exc)
+            continue
+        timings[name] = (time.perf_counter() - start) * 1000
+    logger.info('Compiled %d templates in %.1fms', len(timings), sum(timings.values()))
+    return timings
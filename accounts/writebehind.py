@@ -0,0 +1,60 @@
+import atexit
+import threading
+
+from django.conf import settings
+from django.db import connections
+
+
+class WriteBehindBuffer:
+    """
+        Base class for in-process buffers of writes that are applied to the database in batches.
+
+        Subclasses keep their pending data under self._lock and implement flush(), which must also take
+        self._flush_lock. Once start() has been called, a daemon thread calls flush() every interval seconds (read
+        from the setting named by interval_setting; 0 means no thread, flushing only when asked), and flush() runs
+        once more when the process exits normally.
+        """
+    interval_setting = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Serializes flushes, so that batches are written in the order they were collected.
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    @property
+    def interval(self):
+        return getattr(settings, self.interval_setting)
+
+    def flush(self):
+        raise NotImplementedError
+
+    def wake(self):
+        """Have the background thread flush now, or flush in the calling thread if there is none."""
+        if self.interval > 0:
+            self._wakeup.set()
+        else:
+            self.flush()
+
+    def start(self):
+        if self._started:
+            return
+        with self._start_lock:
+            if self._started:
+                return
+            atexit.register(self.flush)
+            if self.interval > 0:
+                threading.Thread(target=self._run, name=type(self).__name__, daemon=True).start()
+            self._started = True
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval or None)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                # The thread outlives requests, so nothing else would close its connection.
+                connections.close_all()
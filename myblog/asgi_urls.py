@@ -0,0 +1,13 @@
+"""
+URL configuration for requests served under ASGI.
+
+Identical to myblog.urls except that the accounts app is included from accounts.async_urls, which routes the
+read-heavy views to their async versions. Selected by accounts.middleware.AsyncURLConfMiddleware.
+"""
+from django.contrib import admin
+from django.urls import path, include
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('', include('accounts.async_urls')),
+]
@@ -42,16 +42,33 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'accounts.middleware.PrecompressedStaticMiddleware',
+    'accounts.middleware.AsyncURLConfMiddleware',
+    'accounts.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'accounts.middleware.ReplicaRoutingMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.CachedUserAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'accounts.middleware.ViewCountMiddleware',
+    'accounts.middleware.AnonymousPageCacheMiddleware',
 ]
 
+# Per-request SQL/template/view timings in a Server-Timing header (accounts.middleware.RequestTimingMiddleware).
+# Off by default; when off the middleware drops out of the chain entirely.
+REQUEST_TIMING_ENABLED = os.environ.get('REQUEST_TIMING') == '1'
+# Requests slower than this many milliseconds are logged with their SQL to the 'accounts.timing' logger.
+REQUEST_TIMING_SLOW_MS = 500
+
 ROOT_URLCONF = 'myblog.urls'
+
+# URLconf used for requests served under ASGI (accounts.middleware.AsyncURLConfMiddleware): the same routes as
+# ROOT_URLCONF, with the read-heavy views swapped for their async versions.
+ASGI_URLCONF = 'myblog.asgi_urls'
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
 
@@ -71,6 +88,10 @@ TEMPLATES = [
     },
 ]
 
+# Compile every template of the accounts app when a worker process loads myblog.wsgi or myblog.asgi, rather than
+# on the first request to each page (accounts.warmup).
+TEMPLATE_WARMUP = True
+
 WSGI_APPLICATION = 'myblog.wsgi.application'
 
 
@@ -84,6 +105,121 @@ DATABASES = {
     }
 }
 
+# Read replica (e.g. a Litestream or rsync copy of db.sqlite3) that the listing and detail pages read from,
+# see accounts.routers. Without it every query goes to 'default'.
+if os.environ.get('REPLICA_DATABASE'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['REPLICA_DATABASE'],
+    }
+
+DATABASE_ROUTERS = ['accounts.routers.ReadReplicaRouter']
+
+# PRAGMAs run on every new SQLite connection (accounts.signals.configure_sqlite_connection), in order.
+# myblog.settings_production sets the tuned profile; development keeps SQLite's defaults.
+SQLITE_PRAGMAS = {}
+
+# The tuned profile myblog.settings_production uses as SQLITE_PRAGMAS.
+SQLITE_PRODUCTION_PRAGMAS = {
+    # Write-ahead log: readers keep reading the last committed data while a write is in progress, instead of
+    # being locked out. Persistent in the database file.
+    'journal_mode': 'WAL',
+    # With WAL, only a power loss (not an application crash) can lose the last commits; no fsync per commit.
+    'synchronous': 'NORMAL',
+    # Milliseconds a connection waits for a competing writer before failing with "database is locked".
+    'busy_timeout': 5000,
+    # Read the database through a 256 MiB memory map rather than read() calls.
+    'mmap_size': 256 * 1024 * 1024,
+    # Page cache per connection, in KiB when negative: 64 MiB.
+    'cache_size': -64 * 1024,
+}
+
+# Seconds after a write during which the writer's session reads from the primary database instead of the replica,
+# so that people see their own changes even when the replica lags behind.
+REPLICA_STICKY_SECONDS = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Local memory is per process, which is only correct for a single-process server (runserver, tests): cache
+# versions bumped by the signals, cached users and login rate limit buckets would not be shared between worker
+# processes. myblog.settings_production uses a shared cache, and "manage.py check --deploy" warns about LocMemCache.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'myblog',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+# Sessions are read from the cache and only fall back to the database on a miss. Set to
+# 'django.contrib.sessions.backends.signed_cookies' to keep sessions in a signed cookie and off the server entirely
+# (at most about 4 KB of session data, and logging out does not revoke copies of the cookie).
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Seconds the logged-in user is cached for the requests of a session (accounts.cache.cached_user).
+# Profile edits and password changes invalidate it earlier through signals.
+USER_CACHE_TIMEOUT = 60
+
+# Login rate limits (accounts.throttle), checked before a password is hashed: (attempts, per seconds) per client IP
+# address and per email address tried. Attempts over a limit get 429 Too Many Requests.
+LOGIN_THROTTLE_ENABLED = True
+LOGIN_THROTTLE_IP_RATE = (20, 60)
+LOGIN_THROTTLE_EMAIL_RATE = (5, 60)
+
+# Seconds a rendered post_detail block stays cached. Edits invalidate it earlier through signals.
+POST_DETAIL_CACHE_TIMEOUT = 60 * 15
+
+# Seconds a generated RSS/Atom feed stays cached. Post, category and author changes invalidate it earlier.
+FEED_CACHE_TIMEOUT = 60 * 60
+
+# Full-page cache for logged-out visitors (accounts.middleware.AnonymousPageCacheMiddleware).
+# URL names of the pages to cache.
+PAGE_CACHE_VIEWS = ['latest_blog_posts', 'post_detail']
+# Seconds a cached page is served as fresh.
+PAGE_CACHE_TIMEOUT = 60
+# Further seconds a page may be served stale while one request re-renders it.
+PAGE_CACHE_STALE_TIMEOUT = 60 * 5
+# Seconds a re-render holds the lock before another request may take over.
+PAGE_CACHE_LOCK_TIMEOUT = 30
+# Seconds a request waits for another request's render of a cold page before rendering it itself.
+PAGE_CACHE_LOCK_WAIT = 2
+
+# Background tasks (accounts.taskqueue).
+# 'thread' runs tasks on an in-process thread pool, 'database' stores them in the accounts_queuedtask table for
+# "manage.py run_tasks" workers, and 'immediate' runs them inline (useful in tests and scripts).
+TASKS_BACKEND = 'thread'
+# Worker threads of the 'thread' backend.
+TASKS_WORKERS = 2
+# Times a failing task is retried before it is given up on.
+TASKS_MAX_RETRIES = 3
+# Seconds before the first retry; doubled for every further attempt.
+TASKS_RETRY_DELAY = 1.0
+
+# Write-behind comments (accounts.comment_buffer): validated comments are buffered in process memory and written
+# in batches, which absorbs bursts of comments on a hot post. Off by default; a crash loses the waiting comments.
+COMMENT_WRITE_BEHIND = False
+# Buffered comments that trigger a flush.
+COMMENT_BUFFER_SIZE = 100
+# Seconds between flushes of the buffer; 0 flushes only when it is full (and at exit).
+COMMENT_BUFFER_FLUSH_SECONDS = 1.0
+
+# Post view counts (accounts.view_counts): counted in process memory and merged into PostStats periodically.
+# Off by default (on in myblog.settings_production); /popular/ shows whatever has been counted.
+VIEW_COUNTS_ENABLED = False
+# Seconds between merges of the counted views into PostStats; 0 merges only at exit (or when flushed explicitly).
+VIEW_COUNTS_FLUSH_SECONDS = 10
+# Posts listed per window on /popular/.
+POPULAR_POSTS = 10
+# Seconds a /popular/ ranking is cached when it is not refreshed by a flush, e.g. while nobody views any post.
+POPULAR_CACHE_TIMEOUT = 60 * 5
+# Seconds between recomputations of the week, month and all-time rankings, which add up many more PostStats rows
+# than the day's ranking recomputed on every flush. One worker per period does it, claimed through the cache.
+POPULAR_LONG_WINDOWS_REFRESH_SECONDS = 60 * 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -121,6 +257,20 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# The AdminLTE assets; the accounts app's own static files are found in accounts/static.
+STATICFILES_DIRS = [BASE_DIR / 'static']
+
+# Where "manage.py build_static" collects the hashed, precompressed files (accounts.storage).
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Serve STATIC_ROOT from accounts.middleware.PrecompressedStaticMiddleware, picking the brotli or gzip copy of a
+# file by Accept-Encoding. Off by default (on in myblog.settings_production), where runserver serves the
+# uncollected files in DEBUG.
+STATIC_SERVE_PRECOMPRESSED = False
+
+# Seconds browsers may cache static files whose name has no content hash; hashed names are cached for a year.
+STATIC_MAX_AGE = 3600
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -0,0 +1,55 @@
+"""
+Production settings for myblog: DJANGO_SETTINGS_MODULE=myblog.settings_production.
+
+Everything not overridden here comes from myblog.settings.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, SQLITE_PRODUCTION_PRAGMAS
+
+SECRET_KEY = os.environ['SECRET_KEY']
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', 'localhost').split(',')
+
+# Keep connections open across requests instead of reconnecting (and re-running the PRAGMAs below) for each one; the
+# health check replaces a connection that went bad. New dicts, so that myblog.settings.DATABASES is left as it is.
+DATABASES = {alias: {**database, 'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True}
+             for alias, database in DATABASES.items()}
+
+# WAL, synchronous=NORMAL, busy_timeout, mmap_size and cache_size; see myblog.settings.
+SQLITE_PRAGMAS = SQLITE_PRODUCTION_PRAGMAS
+
+# A cache shared by all worker processes, so that invalidations (accounts.cache.bump_version), cached users and
+# login rate limits apply across workers: Redis when REDIS_URL is set (needs the redis package), else files in
+# CACHE_DIR, which works for workers on one machine.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', '/var/tmp/myblog-cache'),
+            'OPTIONS': {
+                'MAX_ENTRIES': 10000,
+            },
+        },
+    }
+
+# Count post views for /popular/; each worker merges its counts into the database every VIEW_COUNTS_FLUSH_SECONDS.
+VIEW_COUNTS_ENABLED = True
+
+# Content-hashed static file names resolved through STATIC_ROOT/staticfiles.json, with gzip/brotli copies written
+# by "manage.py build_static", served with far-future cache headers.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'accounts.storage.CompressedManifestStaticFilesStorage'},
+}
+STATIC_SERVE_PRECOMPRESSED = True
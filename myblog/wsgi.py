@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myblog.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402 (needs the settings module set above)
+
+if settings.TEMPLATE_WARMUP:
+    # Compile the templates now, before the server hands this worker any requests.
+    from accounts.warmup import warm_templates
+
+    warm_templates()